@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
 import logging
+from infrastructure.database.models import User
+from infrastructure.security.auth import get_current_user
 from application.services.ai_service import AIService
+from application.services.ollama_health import AIUnavailableError
+from application.services.skill_matcher import get_skill_matcher
+from api.utils import SSE_HEADERS, run_until_disconnected, sse_text_stream
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -21,22 +28,56 @@ class GenerateJobDescriptionResponse(BaseModel):
     description: str
 
 
+class ExtractSkillsRequest(BaseModel):
+    text: str
+
+
+class ExtractSkillsResponse(BaseModel):
+    skills: List[str]
+
+
+class AIBackendStatus(BaseModel):
+    url: str
+    weight: float
+    max_concurrency: int
+    state: str
+    outstanding: int
+    running: int
+    queued: int
+    requests: int
+    failures: int
+    avg_latency_seconds: Optional[float] = None
+    p95_latency_seconds: Optional[float] = None
+
+
 @router.post("/generate-job-description", response_model=GenerateJobDescriptionResponse)
-async def generate_job_description(request: GenerateJobDescriptionRequest):
+async def generate_job_description(request: GenerateJobDescriptionRequest, http_request: Request):
     """
     Generate a job description using AI based on the provided details.
     Uses local AI Service (Ollama).
     """
     try:
-        description = await ai_service.generate_jd(
+        description = await run_until_disconnected(http_request, ai_service.generate_jd(
             title=request.title,
             skills=request.skills,
             experience_min=request.experience,
             experience_max=request.experience + 2 if request.experience else 3
-        )
+        ))
         
         return GenerateJobDescriptionResponse(description=description)
 
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail="AI generation timed out"
+        )
+    except AIUnavailableError:
+        raise HTTPException(
+            status_code=503,
+            detail="AI service is currently unavailable"
+        )
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -44,3 +85,41 @@ async def generate_job_description(request: GenerateJobDescriptionRequest):
             detail=f"An error occurred: {str(e)}"
         )
 
+
+@router.post("/generate-job-description/stream")
+async def stream_job_description(request: GenerateJobDescriptionRequest):
+    """
+    Streaming variant of generate-job-description (Server-Sent Events).
+    Emits "token" events as the description is generated, then "done" with the
+    full text. Closing the connection cancels the generation.
+    """
+    if not await ai_service.check_availability():
+        raise HTTPException(
+            status_code=503,
+            detail="AI service is currently unavailable"
+        )
+    chunks = ai_service.stream_jd(
+        title=request.title,
+        skills=request.skills,
+        experience_min=request.experience,
+        experience_max=request.experience + 2 if request.experience else 3
+    )
+    return StreamingResponse(sse_text_stream(chunks), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/backends", response_model=List[AIBackendStatus])
+async def get_ai_backends(current_user: User = Depends(get_current_user)):
+    """
+    Per-host status of the Ollama backend pool: health, load and latency.
+    """
+    return ai_service.pool.stats()
+
+
+@router.post("/extract-skills", response_model=ExtractSkillsResponse)
+async def extract_skills(request: ExtractSkillsRequest, current_user: User = Depends(get_current_user)):
+    """
+    Extract canonical skill names from a JD or resume text.
+    Rule-based (skill taxonomy plus department skills); does not call the AI model.
+    """
+    matcher = await asyncio.to_thread(get_skill_matcher)
+    return ExtractSkillsResponse(skills=matcher.extract(request.text))
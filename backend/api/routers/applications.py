@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -7,9 +8,10 @@ import logging
 
 from infrastructure.database.connection import get_db
 from infrastructure.database.models import (
-    Application, Candidate, JobPosting, User, JobRequisition
+    Application, Candidate, CandidateJobMatch, JobPosting, User, JobRequisition
 )
 from infrastructure.security.auth import get_current_user
+from core.config import settings
 from application.schemas import (
     ApplicationCreate,
     ApplicationResponse,
@@ -18,9 +20,15 @@ from application.schemas import (
     MessageResponse
 )
 from application.services.ai_service import AIService
+from application.services.ranking_service import RankingEngine, apply_rank_result
+from application.services.embedding_service import EmbeddingService
+from application.services.match_scorer import FAST_SCORER_VERSION
+from api.utils import run_until_disconnected
 
 router = APIRouter()
 ai_service = AIService()
+embedding_service = EmbeddingService()
+ranking_engine = RankingEngine(ai_service, embedding_service)
 logger = logging.getLogger(__name__)
 
 
@@ -99,8 +107,7 @@ async def submit_application(
                 job_description=job_posting.description,
                 candidate_profile_json=candidate.resume_parsed_data
             )
-            new_application.ai_match_score = result.get("score", 0)
-            new_application.ai_match_reasoning = result.get("reasoning", "AI calculated score")
+            apply_rank_result(ai_service, new_application, job_posting.description, candidate.resume_parsed_data, result)
         except Exception as e:
             logger.error(f"Error calculating AI match score: {e}")
             new_application.ai_match_score = 0
@@ -279,6 +286,9 @@ async def reject_application(
 
     db.commit()
     
+    if remove_from_pool:
+        await embedding_service.remove_candidate(application.candidate_id)
+    
     # Send rejection email to candidate
     logger.info(f"NOTIFICATION: Sending rejection email to candidate {application.candidate_id} for application {application_id}. Reason: {reason}")
     # TODO: Implement real email service
@@ -345,6 +355,7 @@ async def get_application_assessments(
 @router.post("/{application_id}/calculate-match-score", response_model=MessageResponse)
 async def calculate_match_score(
     application_id: str,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -373,14 +384,16 @@ async def calculate_match_score(
         )
     
     # Trigger AI Ranking
-    result = await ai_service.rank_candidate(
+    result = await run_until_disconnected(request, ai_service.rank_candidate(
         job_description=application.job_posting.description,
         candidate_profile_json=application.candidate.resume_parsed_data
-    )
+    ))
     
     # Save to DB
-    application.ai_match_score = result.get("score", 0)
-    application.ai_match_reasoning = result.get("reasoning", "No explanation provided")
+    apply_rank_result(
+        ai_service, application, application.job_posting.description,
+        application.candidate.resume_parsed_data, result
+    )
     
     # Check if we should log this in AIRankingLogs (new table)
     # log = AIRankingLogs(
@@ -403,13 +416,25 @@ async def calculate_match_score(
 @router.post("/rank-by-job-posting/{job_posting_id}", response_model=MessageResponse)
 async def rank_applications_by_job_posting(
     job_posting_id: str,
+    force: bool = Query(False, description="Re-score applications whose JD and profile are unchanged"),
+    mode: str = Query("llm", pattern="^(llm|fast)$", description="llm, or fast for the deterministic LLM-free scorer"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Rank all applications for a specific job posting using AI.
-    This also scans all locally stored candidates (active and not blacklisted) 
+    This also scans locally stored candidates (active and not blacklisted) 
     and creates 'suggested' applications for them if they haven't applied.
+    Once the nightly match matrix covers the posting, only its top matches and candidates
+    added or edited since the matrix was computed are scanned.
+    Among local pool candidates, only the AI_PREFILTER_TOP_K profiles closest to the
+    posting by embedding similarity are suggested and sent to the LLM; every genuine
+    application is always ranked.
+    Applications already scored against the same JD, profile and model keep their
+    score unless force is set, so a re-run only pays for what changed.
+    mode=fast scores every application with the LLM-free match scorer (skills,
+    experience, location and embedding similarity) in milliseconds; it is also
+    used when the AI service is unavailable.
     """
     # Verify job posting exists
     job_posting = db.query(JobPosting).filter(JobPosting.id == job_posting_id).first()
@@ -426,39 +451,72 @@ async def rank_applications_by_job_posting(
             detail="Job posting must have a description to rank candidates"
         )
     
-    # 1. Find all active and not blacklisted candidates
-    all_candidates = db.query(Candidate).filter(
+    from sqlalchemy.orm import joinedload
+    existing_applications = db.query(Application).options(
+        joinedload(Application.candidate)
+    ).filter(
+        Application.job_posting_id == job_posting_id
+    ).all()
+    applied_candidate_ids = {app.candidate_id for app in existing_applications}
+    
+    # 1. Find active and not blacklisted candidates: the posting's best fits from the
+    # nightly match matrix plus anyone added or edited since it was computed, or the whole
+    # pool if it has not been computed for this posting yet
+    pool_query = db.query(Candidate).filter(
         Candidate.is_active == True,
         Candidate.is_blacklisted == False
-    ).all()
+    )
+    matrix_computed_at = db.query(func.max(CandidateJobMatch.computed_at)).filter(
+        CandidateJobMatch.job_posting_id == job_posting_id
+    ).scalar()
+    if matrix_computed_at is None:
+        all_candidates = pool_query.all()
+    else:
+        matrix_ids = db.query(CandidateJobMatch.candidate_id).filter(
+            CandidateJobMatch.job_posting_id == job_posting_id
+        )
+        all_candidates = pool_query.filter(or_(
+            Candidate.id.in_(matrix_ids.scalar_subquery()),
+            Candidate.created_at > matrix_computed_at,
+            Candidate.updated_at > matrix_computed_at
+        )).all()
+    pool_candidates = [c for c in all_candidates if c.id not in applied_candidate_ids]
+    
+    # Embedding pre-filter: only the top-K pool profiles closest to the posting reach the LLM.
+    # It applies to suggestions (new or from earlier runs), never to people who applied
+    suggested_applications = [app for app in existing_applications if app.source == "local_pool"]
+    shortlisted = await embedding_service.prefilter_candidates(
+        EmbeddingService.job_posting_text(job_posting),
+        [app.candidate for app in suggested_applications if app.candidate] + pool_candidates,
+        settings.AI_PREFILTER_TOP_K
+    )
+    shortlisted_ids = {candidate.id for candidate in shortlisted}
     
     suggested_count = 0
-    for candidate in all_candidates:
-        # Check if they already have an application for this job
-        existing_app = db.query(Application).filter(
-            Application.job_posting_id == job_posting_id,
-            Application.candidate_id == candidate.id
-        ).first()
-        
-        if not existing_app:
-            # Create a 'suggested' application from local pool
-            app_number = f"SUG-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
-            new_app = Application(
-                application_number=app_number,
-                job_posting_id=job_posting_id,
-                candidate_id=candidate.id,
-                source="local_pool",
-                status="suggested"
-            )
-            db.add(new_app)
-            suggested_count += 1
+    for candidate in pool_candidates:
+        if candidate.id not in shortlisted_ids:
+            continue
+        # Create a 'suggested' application from local pool
+        app_number = f"SUG-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+        new_app = Application(
+            application_number=app_number,
+            job_posting_id=job_posting_id,
+            candidate_id=candidate.id,
+            source="local_pool",
+            status="suggested"
+        )
+        db.add(new_app)
+        suggested_count += 1
     
     if suggested_count > 0:
         db.flush() # Ensure suggested apps have IDs for ranking
         logger.info(f"Added {suggested_count} suggested candidates from local pool for job {job_posting_id}")
 
     # 2. Get all applications for this job posting (now including suggested ones)
-    applications = db.query(Application).filter(
+    applications = db.query(Application).options(
+        joinedload(Application.candidate),
+        joinedload(Application.job_posting)
+    ).filter(
         Application.job_posting_id == job_posting_id
     ).all()
     
@@ -468,63 +526,54 @@ async def rank_applications_by_job_posting(
             "success": True
         }
     
-    ranked_count = 0
-    skipped_count = 0
-    
-    for application in applications:
-        try:
-            # Parse resume if not already parsed
-            if application.candidate and application.candidate.resume_url:
-                if not application.candidate.resume_parsed_data:
-                    # Determine mime type from extension
-                    mime_type = "application/pdf" if application.candidate.resume_url.lower().endswith(".pdf") else "text/plain"
-                    parsed_data = await ai_service.parse_resume(
-                        application.candidate.resume_url,
-                        mime_type
-                    )
-                    
-                    if "error" not in parsed_data:
-                        application.candidate.resume_parsed_data = parsed_data
-                        application.candidate.skills = parsed_data.get("skills", [])
-                        application.candidate.total_experience_years = parsed_data.get("total_experience_years")
-            
-            # Rank candidate if we have parsed data
-            if application.candidate and application.candidate.resume_parsed_data:
-                result = await ai_service.rank_candidate(
-                    job_description=job_posting.description,
-                    candidate_profile_json=application.candidate.resume_parsed_data
-                )
-                
-                application.ai_match_score = result.get("score", 0)
-                application.ai_match_reasoning = result.get("reasoning", "No explanation provided")
-                ranked_count += 1
-            else:
-                skipped_count += 1
-                
-        except Exception as e:
-            logger.error(f"Error ranking application {application.id}: {e}")
-            skipped_count += 1
-            continue
-    
-    db.commit()
+    fallback = mode == "llm" and not await ai_service.check_availability()
+    if mode == "fast" or fallback:
+        # Cheap enough to score every application, pre-filtered or not. As a fallback it
+        # keeps LLM scores that are still current, so the next LLM run does not redo them
+        to_rank = applications
+        stats = await ranking_engine.rank_applications_fast(db, to_rank, keep_llm_scores=fallback)
+    else:
+        to_rank = [app for app in applications if app.source != "local_pool" or app.candidate_id in shortlisted_ids]
+        # Parse missing resumes and rank concurrently across the available LLM slots
+        stats = await ranking_engine.rank_applications(db, to_rank, parse_missing=True, force=force)
+    filtered_count = len(applications) - len(to_rank)
+    ranked_count = stats["ranked"]
+    skipped_count = stats["skipped"] + stats["errors"]
+    
+    message = f"Ranked {ranked_count} candidates successfully. Added {suggested_count} from local pool. Skipped {skipped_count}."
+    if fallback:
+        message += " AI service is unavailable, so the fast match scorer was used."
+    if stats["unchanged"]:
+        message += f" {stats['unchanged']} unchanged since their last ranking kept their score."
+    if filtered_count:
+        message += f" {filtered_count} suggested candidates below the similarity pre-filter were not re-ranked."
     
     return {
-        "message": f"Ranked {ranked_count} candidates successfully. Added {suggested_count} from local pool. Skipped {skipped_count}.",
+        "message": message,
         "success": True
     }
 
 
 @router.post("/rank-all", response_model=MessageResponse)
 async def rank_all_applications(
+    mode: str = Query("llm", pattern="^(llm|fast)$", description="llm, or fast for the deterministic LLM-free scorer"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Rank all applications that don't have an AI score yet.
+    mode=fast uses the LLM-free match scorer instead of the AI service, as does
+    a run while the AI service is unavailable. In llm mode, applications that only
+    have a fast-scorer score are ranked by the LLM too.
     """
-    applications = db.query(Application).filter(
-        Application.ai_match_score == None
-    ).all()
+    from sqlalchemy.orm import joinedload
+    unscored = Application.ai_match_score == None
+    if mode == "llm":
+        unscored = or_(unscored, Application.ai_model_version == FAST_SCORER_VERSION)
+    applications = db.query(Application).options(
+        joinedload(Application.candidate),
+        joinedload(Application.job_posting)
+    ).filter(unscored).all()
     
     if not applications:
         return {
@@ -532,31 +581,17 @@ async def rank_all_applications(
             "success": True
         }
     
-    ranked_count = 0
-    error_count = 0
-    
-    for app in applications:
-        try:
-            if not app.job_posting or not app.job_posting.description:
-                continue
-                
-            # Trigger ranking
-            candidate_data = app.candidate.resume_parsed_data if (app.candidate and app.candidate.resume_parsed_data) else {}
-            result = await ai_service.rank_candidate(
-                job_description=app.job_posting.description,
-                candidate_profile_json=candidate_data
-            )
-            
-            app.ai_match_score = result.get("score", 0)
-            app.ai_match_reasoning = result.get("reasoning", "No explanation provided")
-            ranked_count += 1
-        except Exception as e:
-            logger.error(f"Error ranking application {app.id}: {e}")
-            error_count += 1
-            
-    db.commit()
+    if mode == "fast" or not await ai_service.check_availability():
+        stats = await ranking_engine.rank_applications_fast(db, applications, keep_llm_scores=mode == "llm")
+    else:
+        stats = await ranking_engine.rank_applications(
+            db,
+            applications,
+            parse_missing=False,
+            allow_empty_profile=True
+        )
     
     return {
-        "message": f"Successfully ranked {ranked_count} applications. {error_count} errors.",
+        "message": f"Successfully ranked {stats['ranked']} applications. {stats['errors']} errors.",
         "success": True
     }
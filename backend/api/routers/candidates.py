@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, File, UploadFile, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import asyncio
 import uuid
 from datetime import datetime
 import shutil
@@ -9,14 +10,24 @@ import logging
 
 from infrastructure.database.connection import get_db
 from infrastructure.database.models import (
-    Candidate, CandidateDocument, User
+    Candidate, CandidateDocument, CandidateJobMatch, JobPosting, ResumeParseJob, User
 )
 from infrastructure.security.auth import get_current_user
-from application.schemas import CandidateCreate, CandidateUpdate, CandidateResponse, MessageResponse
+from application.schemas import (
+    CandidateCreate, CandidateUpdate, CandidateResponse, CandidateJobMatchResponse, MessageResponse,
+    RecommendedJobResponse, ResumeParseJobResponse, SimilarCandidateResponse
+)
+from core.config import settings
 from application.services.ai_service import AIService
+from application.services.embedding_service import EmbeddingService, get_posting_index
+from application.services.match_matrix_service import active_posting_filters
+from application.services.resume_parsing_service import (
+    apply_parsed_resume, is_partial_parse, resume_mime_type, run_parse_job_in_process
+)
 
 router = APIRouter()
 ai_service = AIService()
+embedding_service = EmbeddingService()
 logger = logging.getLogger(__name__)
 
 
@@ -142,6 +153,9 @@ async def update_candidate(
     db.commit()
     db.refresh(candidate)
     
+    # Keep the embedding index in step (re-embeds changed profiles, drops deactivated ones)
+    await embedding_service.index_candidate(candidate)
+    
     return candidate
 
 
@@ -165,6 +179,7 @@ async def delete_candidate(
     
     db.delete(candidate)
     db.commit()
+    await embedding_service.remove_candidate(candidate_id)
     
     return {
         "message": "Candidate deleted successfully",
@@ -175,12 +190,14 @@ async def delete_candidate(
 @router.post("/{candidate_id}/upload-resume")
 async def upload_resume(
     candidate_id: str,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
     """
-    Upload and parse candidate resume.
+    Upload candidate resume and queue it for AI parsing.
     Supports PDF, DOC, DOCX formats.
+    Poll GET /{candidate_id}/parse-jobs/{job_id} for parsing progress.
     """
     candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
     
@@ -228,19 +245,56 @@ async def upload_resume(
     
     db.commit()
     
-    # Trigger parsing automatically
-    try:
-        await parse_resume(candidate_id, db, None) 
-    except Exception as e:
-        logger.error(f"Failed to auto-parse resume for candidate {candidate_id}: {e}")
+    # Queue parsing in the background so the upload returns immediately
+    job = ResumeParseJob(candidate_id=candidate.id, status="queued", progress=0)
+    db.add(job)
+    db.commit()
+    await _enqueue_parse_job(str(job.id), background_tasks)
     
     return {
-        "message": "Resume uploaded and parsing initiated",
+        "message": "Resume uploaded and parsing queued",
         "success": True,
-        "file_url": file_path
+        "file_url": file_path,
+        "job_id": str(job.id)
     }
 
 
+async def _enqueue_parse_job(job_id: str, background_tasks: BackgroundTasks) -> None:
+    """Hands a parse job to Celery, or runs it in-process after the response if no broker is reachable."""
+    if settings.CELERY_ENABLED:
+        try:
+            from tasks import parse_resume_task
+            # Publishing is a blocking network call; keep it off the event loop
+            await asyncio.to_thread(parse_resume_task.delay, job_id)
+            return
+        except Exception as e:
+            logger.warning(f"Task queue unavailable, parsing resume job {job_id} in-process: {e}")
+    background_tasks.add_task(run_parse_job_in_process, job_id, settings.RESUME_PARSE_MAX_RETRIES)
+
+
+@router.get("/{candidate_id}/parse-jobs/{job_id}", response_model=ResumeParseJobResponse)
+async def get_parse_job(
+    candidate_id: str,
+    job_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Get the status and progress of a background resume parsing job.
+    """
+    job = db.query(ResumeParseJob).filter(
+        ResumeParseJob.id == job_id,
+        ResumeParseJob.candidate_id == candidate_id
+    ).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Parse job not found"
+        )
+    
+    return job
+
+
 @router.post("/{candidate_id}/parse-resume", response_model=MessageResponse)
 async def parse_resume(
     candidate_id: str,
@@ -267,7 +321,7 @@ async def parse_resume(
     
     # Use AI Service
     try:
-        parsed_data = await ai_service.parse_resume(candidate.resume_url)
+        parsed_data = await ai_service.parse_resume(candidate.resume_url, resume_mime_type(candidate.resume_url))
         
         if not parsed_data or "error" in parsed_data:
             return {
@@ -276,36 +330,17 @@ async def parse_resume(
             }
         
         # Update candidate with parsed data
-        candidate.resume_parsed_data = parsed_data
-        
-        # Only update basic fields if they are missing or if parsed data has them
-        if parsed_data.get("first_name"):
-            candidate.first_name = parsed_data["first_name"]
-        if parsed_data.get("last_name"):
-            candidate.last_name = parsed_data["last_name"]
-        if parsed_data.get("email"):
-            candidate.email = parsed_data["email"]
-        if parsed_data.get("phone"):
-            candidate.phone = parsed_data["phone"]
-            
-        candidate.skills = parsed_data.get("skills", [])
+        apply_parsed_resume(candidate, parsed_data)
         
-        if parsed_data.get("highest_education"):
-            candidate.highest_education = parsed_data["highest_education"]
-        if parsed_data.get("current_company"):
-            candidate.current_company = parsed_data["current_company"]
-        if parsed_data.get("current_designation"):
-            candidate.current_designation = parsed_data["current_designation"]
+        db.commit()
         
-        # Convert experience to decimal if possible
-        exp = parsed_data.get("total_experience_years")
-        if exp is not None:
-            try:
-                candidate.total_experience_years = float(exp)
-            except (ValueError, TypeError):
-                pass
+        if is_partial_parse(parsed_data):
+            return {
+                "message": "AI Service is offline. Only contact details were extracted from the resume.",
+                "success": True
+            }
         
-        db.commit()
+        await embedding_service.index_candidate(candidate)
         
         return {
             "message": "Resume parsed successfully",
@@ -340,6 +375,7 @@ async def blacklist_candidate(
     candidate.is_blacklisted = True
     candidate.blacklist_reason = reason
     db.commit()
+    await embedding_service.remove_candidate(candidate_id)
     
     return {
         "message": "Candidate blacklisted successfully",
@@ -367,6 +403,7 @@ async def unblacklist_candidate(
     candidate.is_blacklisted = False
     candidate.blacklist_reason = None
     db.commit()
+    await embedding_service.index_candidate(candidate)
     
     return {
         "message": "Candidate removed from blacklist",
@@ -374,6 +411,147 @@ async def unblacklist_candidate(
     }
 
 
+@router.get("/{candidate_id}/matching-jobs", response_model=List[CandidateJobMatchResponse])
+async def get_matching_jobs(
+    candidate_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Open job postings that best fit a candidate.
+    Read from the precomputed match matrix (rebuilt nightly), so no scoring happens here.
+    """
+    rows = db.query(CandidateJobMatch, JobPosting.title).join(
+        JobPosting, JobPosting.id == CandidateJobMatch.job_posting_id
+    ).filter(
+        CandidateJobMatch.candidate_id == candidate_id,
+        *active_posting_filters()
+    ).order_by(CandidateJobMatch.score.desc()).limit(limit).all()
+    
+    return [
+        CandidateJobMatchResponse(
+            job_posting_id=match.job_posting_id,
+            candidate_id=match.candidate_id,
+            score=match.score,
+            posting_rank=match.posting_rank,
+            candidate_rank=match.candidate_rank,
+            computed_at=match.computed_at,
+            job_title=title
+        )
+        for match, title in rows
+    ]
+
+
+# Nearest-neighbour hits are filtered against the database afterwards (inactive,
+# blacklisted or closed entries), so a few more than requested are fetched
+KNN_OVERFETCH = 20
+
+
+def _get_comparable_candidate(candidate_id: str, db: Session) -> Candidate:
+    candidate = db.query(Candidate).filter(Candidate.id == candidate_id).first()
+    
+    if not candidate:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Candidate not found"
+        )
+    
+    if not embedding_service.candidate_profile_text(candidate):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Candidate has no skills, experience or parsed resume to compare"
+        )
+    
+    return candidate
+
+
+def _embedding_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Embedding model is currently unavailable"
+    )
+
+
+@router.get("/{candidate_id}/similar", response_model=List[SimilarCandidateResponse])
+async def get_similar_candidates(
+    candidate_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Candidates from the talent pool whose profiles are closest to this one (e.g. a strong hire),
+    by cosine similarity of profile embeddings, served from the persistent vector index.
+    """
+    candidate = _get_comparable_candidate(candidate_id, db)
+    hits = await embedding_service.similar_candidates(candidate, limit + KNN_OVERFETCH)
+    if hits is None:
+        raise _embedding_unavailable()
+    
+    similarity = dict(hits)
+    matches = db.query(Candidate).filter(
+        Candidate.id.in_(list(similarity)),
+        Candidate.is_active == True,
+        Candidate.is_blacklisted == False
+    ).all()
+    matches.sort(key=lambda match: similarity[str(match.id)], reverse=True)
+    
+    return [
+        SimilarCandidateResponse(
+            candidate_id=match.id,
+            similarity=round(similarity[str(match.id)], 4),
+            candidate_name=f"{match.first_name} {match.last_name}",
+            current_designation=match.current_designation,
+            total_experience_years=match.total_experience_years,
+            current_location=match.current_location
+        )
+        for match in matches[:limit]
+    ]
+
+
+@router.get("/{candidate_id}/recommended-jobs", response_model=List[RecommendedJobResponse])
+async def get_recommended_jobs(
+    candidate_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Open job postings closest to a candidate's profile, by cosine similarity of embeddings.
+    Unlike /matching-jobs this is computed live from the vector index, so it covers
+    candidates and postings added since the last match matrix rebuild.
+    """
+    candidate = _get_comparable_candidate(candidate_id, db)
+    if not await asyncio.to_thread(lambda: len(get_posting_index())):
+        # Index not built yet (normally kept up to date on posting changes and nightly)
+        await embedding_service.posting_vectors(
+            db.query(JobPosting).filter(*active_posting_filters()).all()
+        )
+    hits = await embedding_service.recommended_postings(candidate, limit + KNN_OVERFETCH)
+    if hits is None:
+        raise _embedding_unavailable()
+    
+    similarity = dict(hits)
+    postings = db.query(JobPosting).filter(
+        JobPosting.id.in_(list(similarity)),
+        *active_posting_filters()
+    ).all()
+    postings.sort(key=lambda posting: similarity[str(posting.id)], reverse=True)
+    
+    return [
+        RecommendedJobResponse(
+            job_posting_id=posting.id,
+            similarity=round(similarity[str(posting.id)], 4),
+            job_code=posting.job_code,
+            title=posting.title,
+            location=posting.location,
+            employment_type=posting.employment_type
+        )
+        for posting in postings[:limit]
+    ]
+
+
 @router.get("/{candidate_id}/documents")
 async def get_candidate_documents(
     candidate_id: str,
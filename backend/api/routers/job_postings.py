@@ -1,23 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import logging
 import uuid
 
 from infrastructure.database.connection import get_db
-from infrastructure.database.models import User, JobPosting, JobPostingPlatform, JobRequisition
+from infrastructure.database.models import (
+    User, JobPosting, JobPostingPlatform, JobRequisition, Candidate, CandidateJobMatch
+)
 from infrastructure.security.auth import get_current_user
 from application.schemas import (
+    CandidateJobMatchResponse,
     JobPostingCreate,
     JobPostingResponse,
     MessageResponse
 )
 from application.services.ai_service import AIService
+from application.services.embedding_service import EmbeddingService
 from application.services.linkedin_service import LinkedInService
+from application.services.match_matrix_service import run_match_matrix_job
 from core.config import settings
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 ai_service = AIService()
+embedding_service = EmbeddingService()
 linkedin_service = LinkedInService()
 
 
@@ -126,6 +135,7 @@ async def create_job_posting(
     db.add(new_posting)
     db.commit()
     db.refresh(new_posting)
+    await embedding_service.index_job_posting(new_posting)
     
     return new_posting
 
@@ -234,10 +244,63 @@ async def update_job_posting_status(
         
     db.commit()
     db.refresh(posting)
+    await embedding_service.index_job_posting(posting)
     
     return posting
 
 
+@router.post("/match-matrix/refresh", response_model=MessageResponse)
+async def refresh_match_matrix(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Rebuild the candidate x job posting match matrix now instead of waiting for the nightly run.
+    """
+    if settings.CELERY_ENABLED:
+        try:
+            from tasks import compute_match_matrix_task
+            await asyncio.to_thread(compute_match_matrix_task.delay)
+            return {"message": "Match matrix rebuild queued", "success": True}
+        except Exception as e:
+            logger.warning(f"Task queue unavailable, rebuilding match matrix in-process: {e}")
+    background_tasks.add_task(run_match_matrix_job)
+    return {"message": "Match matrix rebuild started", "success": True}
+
+
+@router.get("/{posting_id}/matches", response_model=List[CandidateJobMatchResponse])
+async def get_posting_matches(
+    posting_id: str,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Best-matching candidates from the talent pool for a job posting.
+    Read from the precomputed match matrix (rebuilt nightly), so no scoring happens here.
+    """
+    rows = db.query(CandidateJobMatch, Candidate.first_name, Candidate.last_name).join(
+        Candidate, Candidate.id == CandidateJobMatch.candidate_id
+    ).filter(
+        CandidateJobMatch.job_posting_id == posting_id,
+        Candidate.is_active == True,
+        Candidate.is_blacklisted == False
+    ).order_by(CandidateJobMatch.score.desc()).limit(limit).all()
+    
+    return [
+        CandidateJobMatchResponse(
+            job_posting_id=match.job_posting_id,
+            candidate_id=match.candidate_id,
+            score=match.score,
+            posting_rank=match.posting_rank,
+            candidate_rank=match.candidate_rank,
+            computed_at=match.computed_at,
+            candidate_name=f"{first_name} {last_name}"
+        )
+        for match, first_name, last_name in rows
+    ]
+
+
 @router.get("/{posting_id}", response_model=JobPostingResponse)
 async def get_job_posting(
     posting_id: str,
@@ -287,6 +350,7 @@ async def update_job_posting(
     
     db.commit()
     db.refresh(posting)
+    await embedding_service.index_job_posting(posting)
     
     return posting
 
@@ -310,6 +374,7 @@ async def delete_job_posting(
     
     posting.is_active = False
     db.commit()
+    await embedding_service.remove_job_posting(posting_id)
     
     return {
         "message": "Job posting deactivated successfully",
@@ -374,6 +439,7 @@ async def publish_job_posting(
             success_count += 1
     
     db.commit()
+    await embedding_service.index_job_posting(posting)
     
     return {
         "message": f"Job posting publishing initiated for {success_count} new platform(s)",
@@ -418,6 +484,7 @@ async def expire_job_posting(
     posting.is_active = False
     posting.status_state = "Expired"
     db.commit()
+    await embedding_service.remove_job_posting(posting_id)
     
     return {
         "message": "Job posting expired successfully",
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
+import asyncio
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
-from infrastructure.database.connection import get_db
+from infrastructure.database.connection import get_db, SessionLocal
 from infrastructure.database.models import (
     User, JobRequisition, JobRequisitionApproval, DepartmentSkill
 )
@@ -24,7 +26,10 @@ from application.schemas import (
 )
 from core.config import settings
 from application.services.ai_service import AIService
+from application.services.ollama_health import AIUnavailableError
+from application.services.skill_matcher import invalidate_skill_matcher
 from application.services.linkedin_service import LinkedInService
+from api.utils import SSE_HEADERS, run_until_disconnected, sse_text_stream
 
 router = APIRouter()
 ai_service = AIService()
@@ -416,6 +421,7 @@ async def approve_job_requisition(
 @router.post("/{requisition_id}/generate-jd", response_model=MessageResponse)
 async def generate_job_description(
     requisition_id: str,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -433,12 +439,23 @@ async def generate_job_description(
     
     # Use AI Service
     # We pass the requisition details
-    generated_jd = await ai_service.generate_jd(
-        title=requisition.title,
-        skills=requisition.required_skills or [],
-        experience_min=requisition.experience_min,
-        experience_max=requisition.experience_max
-    )
+    try:
+        generated_jd = await run_until_disconnected(request, ai_service.generate_jd(
+            title=requisition.title,
+            skills=requisition.required_skills or [],
+            experience_min=requisition.experience_min,
+            experience_max=requisition.experience_max
+        ))
+    except AIUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service is currently unavailable"
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="AI generation timed out"
+        )
     
     # Append other details if not included by AI (though prompt handles most)
     
@@ -451,6 +468,52 @@ async def generate_job_description(
     }
 
 
+@router.post("/{requisition_id}/generate-jd/stream")
+async def stream_job_description(
+    requisition_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streaming variant of generate-jd (Server-Sent Events).
+    Emits "token" events as the description is generated; once it is complete it is
+    saved to the requisition and a "done" event with the full text is sent.
+    Closing the connection cancels the generation and leaves the requisition unchanged.
+    """
+    requisition = db.query(JobRequisition).filter(JobRequisition.id == requisition_id).first()
+    
+    if not requisition:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job requisition not found"
+        )
+    
+    if not await ai_service.check_availability():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service is currently unavailable"
+        )
+    
+    def save(job_description: str) -> None:
+        # The request's session may already be closed once the stream ends
+        session = SessionLocal()
+        try:
+            session.query(JobRequisition).filter(JobRequisition.id == requisition_id).update(
+                {JobRequisition.job_description: job_description}
+            )
+            session.commit()
+        finally:
+            session.close()
+    
+    chunks = ai_service.stream_jd(
+        title=requisition.title,
+        skills=requisition.required_skills or [],
+        experience_min=requisition.experience_min,
+        experience_max=requisition.experience_max
+    )
+    return StreamingResponse(sse_text_stream(chunks, on_complete=save), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/{requisition_id}/share-linkedin", response_model=MessageResponse)
 async def share_requisition_linkedin(
     requisition_id: str,
@@ -601,4 +664,5 @@ async def add_department_skill(
     db.add(new_skill)
     db.commit()
     db.refresh(new_skill)
+    invalidate_skill_matcher()
     return new_skill
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import logging
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+import httpx
+from fastapi import HTTPException, Request
+from application.services.ollama_health import AIUnavailableError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable[T], poll_interval: float = 0.5) -> T:
+    """
+    Awaits a long-running call (typically an LLM generation) and cancels it
+    if the HTTP client disconnects first, so abandoned requests free model capacity.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+# Keeps proxies (e.g. nginx) from buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formats one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_text_stream(
+    chunks: AsyncGenerator[str, None],
+    on_complete: Optional[Callable[[str], None]] = None
+) -> AsyncIterator[str]:
+    """
+    Relays generated text as Server-Sent Events: a "token" event per piece, then
+    "done" with the full text, or "error" (with an HTTP-like status) if generation fails.
+    on_complete is called (in a worker thread) with the full text before "done" is sent.
+    If the client disconnects, the generation is closed and stops on the model host.
+    """
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield sse_event("token", {"text": chunk})
+        text = "".join(parts)
+        if on_complete is not None:
+            await asyncio.to_thread(on_complete, text)
+        yield sse_event("done", {"text": text})
+    except AIUnavailableError:
+        yield sse_event("error", {"status": 503, "detail": "AI service is currently unavailable"})
+    except (asyncio.TimeoutError, httpx.TimeoutException):
+        yield sse_event("error", {"status": 504, "detail": "AI generation timed out"})
+    except Exception as e:
+        logger.error(f"Streaming generation failed: {e}", exc_info=True)
+        yield sse_event("error", {"status": 500, "detail": f"An error occurred: {str(e)}"})
+    finally:
+        await chunks.aclose()
@@ -211,6 +211,50 @@ class CandidateResponse(CandidateBase):
         from_attributes = True
 
 
+class ResumeParseJobResponse(BaseModel):
+    id: UUID
+    candidate_id: UUID
+    status: str
+    progress: int
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class CandidateJobMatchResponse(BaseModel):
+    job_posting_id: UUID
+    candidate_id: UUID
+    score: float
+    posting_rank: Optional[int] = None
+    candidate_rank: Optional[int] = None
+    computed_at: datetime
+    candidate_name: Optional[str] = None
+    job_title: Optional[str] = None
+
+
+class SimilarCandidateResponse(BaseModel):
+    candidate_id: UUID
+    similarity: float
+    candidate_name: str
+    current_designation: Optional[str] = None
+    total_experience_years: Optional[float] = None
+    current_location: Optional[str] = None
+
+
+class RecommendedJobResponse(BaseModel):
+    job_posting_id: UUID
+    similarity: float
+    job_code: str
+    title: str
+    location: Optional[str] = None
+    employment_type: Optional[str] = None
+
+
 # ============================================
 # APPLICATION SCHEMAS
 # ============================================
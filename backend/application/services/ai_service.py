@@ -1,79 +1,566 @@
+import asyncio
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
-from typing import Dict, Any, List, Optional
-import pdfplumber
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
 import httpx
-from langchain_community.llms import Ollama
+from core.config import settings
+from application.services.ollama_client import OllamaClient, GenerationStats, close_http_client
+from application.services.ollama_health import AIUnavailableError
+from application.services.text_cache import ResumeTextCache, file_sha256
+from application.services.result_cache import ResultCache
+from application.services.pdf_extraction import extract_pdf_text
+from application.services.resume_heuristics import extract_contact_details, name_matches_email, pack_resume_text
+from application.services.skill_matcher import get_skill_matcher
+from application.services.single_flight import SingleFlight
+from application.services.llm_scheduler import current_priority
+from application.services.backend_pool import Backend, get_backend_pool
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Bump whenever the rank_candidate prompt changes so cached scores are not reused
+RANK_PROMPT_VERSION = "2"
+
+# Generation limits per prompt type. JSON prompts additionally run in Ollama's
+# JSON mode and stop as soon as the object closes, so num_predict is only a ceiling.
+TASK_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "parse_resume": {"num_predict": 1024},
+    "rank_candidate": {"num_predict": 256},
+    "rank_candidates_batch": {"num_predict": 1024},
+    "summarize_jd": {"num_predict": 256},
+    "generate_jd": {"num_predict": 1536, "stop": ["\nNote:", "\nLet me know"]},
+}
+
+
+# Rough average for English prose with llama tokenizers
+CHARS_PER_TOKEN = 3.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~3.5 characters per token for English prose, rounded up)."""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def context_window_for(prompt: str, num_predict: int) -> int:
+    """
+    Smallest configured context bucket that fits the prompt plus its output budget.
+    Sizes are bucketed rather than exact because Ollama reloads the model
+    whenever num_ctx changes; a handful of buckets keeps reloads rare.
+    """
+    needed = estimate_tokens(prompt) + num_predict + 64
+    buckets = settings.ai_context_buckets
+    for size in buckets:
+        if size >= needed:
+            return size
+    return buckets[-1]
+
+def rank_prompt_prefix(job_description: str) -> str:
+    """
+    Opening of every ranking prompt for a JD. It must stay byte-identical across
+    candidates (and between single and batched prompts) so Ollama can reuse the
+    already evaluated prefix from its KV cache instead of re-reading the JD.
+    """
+    return (
+        "Act as a Hiring Manager. Evaluate each Candidate against the Job Description independently.\n\n"
+        f"Job Description:\n{job_description[:4000]}\n\n"
+    )
+
+
+class RankingRun:
+    """
+    State shared by the LLM calls of one ranking run.
+    Keeps the model loaded for AI_RANKING_KEEP_ALIVE between calls and never shrinks
+    num_ctx mid-run (a change reloads the model and discards the cached JD prefix).
+    Also estimates the prompt-eval time saved by prefix reuse: the first call is
+    taken as the cold baseline and later calls are compared against it per token.
+    """
+
+    def __init__(self, keep_alive: Optional[str] = None):
+        self.keep_alive = keep_alive or settings.AI_RANKING_KEEP_ALIVE
+        self.num_ctx = 0
+        self.calls = 0
+        self.seconds_per_token: Optional[float] = None
+        self.prompt_eval_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def context_window(self, prompt: str, num_predict: int) -> int:
+        self.num_ctx = max(self.num_ctx, context_window_for(prompt, num_predict))
+        return self.num_ctx
+
+    def record(self, prompt: str, stats: GenerationStats) -> None:
+        prompt_seconds = stats.prompt_seconds
+        if prompt_seconds is None:
+            return
+        tokens = estimate_tokens(prompt)
+        self.calls += 1
+        self.prompt_eval_seconds += prompt_seconds
+        if self.seconds_per_token is None:
+            self.seconds_per_token = prompt_seconds / tokens
+            return
+        saved = max(0.0, self.seconds_per_token * tokens - prompt_seconds)
+        self.saved_seconds += saved
+        logger.debug(
+            f"Ranking call {self.calls}: prompt eval {prompt_seconds:.3f}s "
+            f"({stats.prompt_eval_count} tokens evaluated), ~{saved:.3f}s saved by prefix reuse"
+        )
+
+
+_text_cache: Optional[ResumeTextCache] = None
+
+
+def _get_text_cache() -> ResumeTextCache:
+    global _text_cache
+    if _text_cache is None:
+        _text_cache = ResumeTextCache()
+    return _text_cache
+
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    # pdfplumber is CPU-bound pure Python; run it in separate processes so it
+    # never holds the GIL on the event-loop thread. "spawn" avoids forking a
+    # process that already has running threads.
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pdf_pool
+
+
+def _reset_pdf_pool() -> None:
+    """
+    Kills the PDF workers and starts a fresh pool on next use. Used after a timeout:
+    a page that never finishes would otherwise hold its worker forever, and once
+    every worker is stuck all later extractions queue behind them.
+    Extractions running in the other workers fail and are retried by their callers.
+    """
+    global _pdf_pool
+    pool, _pdf_pool = _pdf_pool, None
+    if pool is None:
+        return
+    # ProcessPoolExecutor has no public way to stop a running task
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def shutdown_ai_resources() -> None:
+    """Releases process-wide AI resources. Called on application shutdown."""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+    await close_http_client()
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def _get_result_cache() -> ResultCache:
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache()
+    return _result_cache
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Identical generations already running anywhere in this process are shared, so
+# repeated clicks and concurrent users asking for the same thing cost one LLM call.
+_in_flight = SingleFlight()
+
+
+def generation_key(model: str, task: str, json_mode: bool, num_predict: int, prompt: str) -> str:
+    # Whitespace differences (e.g. prompt indentation) never change the answer
+    normalized_prompt = " ".join(prompt.split())
+    return fingerprint("|".join([model, task, str(json_mode), str(num_predict), normalized_prompt]))
+
+
+def extract_json_object(response: str) -> Optional[Dict[str, Any]]:
+    """Parses the outermost {...} block of an LLM response; None if missing or invalid."""
+    if not response:
+        return None
+    start_idx = response.find('{')
+    end_idx = response.rfind('}') + 1
+    if start_idx == -1 or end_idx == 0:
+        return None
+    try:
+        data = json.loads(response[start_idx:end_idx])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _is_number(value: Any) -> bool:
+    try:
+        float(value)
+        return not isinstance(value, bool)
+    except (TypeError, ValueError):
+        return False
+
+
+def valid_resume_data(data: Dict[str, Any]) -> bool:
+    return isinstance(data.get("skills", []), list) and any(
+        data.get(field) for field in ("first_name", "last_name", "email", "skills", "experience")
+    )
+
+
+def valid_rank_result(data: Dict[str, Any]) -> bool:
+    return _is_number(data.get("score"))
+
+
+def valid_poster_summary(data: Dict[str, Any]) -> bool:
+    return isinstance(data.get("job_title"), str) and isinstance(data.get("requirements"), list)
+
+
+class JDCleaner:
+    """
+    Strips the filler LLMs wrap around a generated JD: anything before the first
+    "# " header (kept if there is no header at all) and lines starting with "Note:"
+    or containing "let me know". Works line by line, so it can clean a streamed
+    generation as it arrives.
+    """
+
+    def __init__(self):
+        self._partial = ""
+        self._preamble: List[str] = []
+        self._started = False
+        self._emitted = False
+        self._blank_lines = 0
+
+    def feed(self, piece: str) -> str:
+        """Adds generated text; returns the cleaned text that became final."""
+        lines = (self._partial + piece).split("\n")
+        self._partial = lines.pop()
+        return "".join(self._line(line) for line in lines)
+
+    def finish(self) -> str:
+        """Returns the cleaned remainder once the generation is over."""
+        out = self._line(self._partial)
+        self._partial = ""
+        if not self._started:
+            self._started = True
+            out += "".join(self._emit(line) for line in self._preamble)
+            self._preamble = []
+        return out
+
+    def _line(self, line: str) -> str:
+        if not self._started:
+            if not line.strip().startswith("# "):
+                self._preamble.append(line)
+                return ""
+            self._started = True
+            self._preamble = []
+        return self._emit(line)
+
+    def _emit(self, line: str) -> str:
+        line = line.rstrip()
+        if line.strip().lower().startswith("note:") or "let me know" in line.lower():
+            return ""
+        if not line:
+            # Blank lines are only written once more content follows, so the result ends trimmed
+            self._blank_lines += self._emitted
+            return ""
+        if not self._emitted:
+            self._emitted = True
+            return line.lstrip()
+        out = "\n" * (self._blank_lines + 1) + line
+        self._blank_lines = 0
+        return out
+
+
+def clean_job_description(text: str) -> str:
+    cleaner = JDCleaner()
+    return cleaner.feed(text) + cleaner.finish()
+
+
 class AIService:
     def __init__(self):
-        # We assume Ollama is running locally on default port
-        self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        self.model_name = "llama3" 
-        self._is_available = None # Lazy check
-        try:
-            self.llm = Ollama(
-            base_url=self.ollama_base_url, 
-            model=self.model_name,
-            num_predict=4096,
-            num_ctx=8192
-        )
-        except Exception as e:
-            logger.warning(f"Failed to initialize Ollama LLM: {e}")
-            self.llm = None
+        # Calls are load-balanced over every configured Ollama server (see backend_pool)
+        self.pool = get_backend_pool()
+        self.model_name = settings.OLLAMA_MODEL
+        self.request_timeout = settings.AI_REQUEST_TIMEOUT_SECONDS
+        # One configured client per host, prompt type and model, each with its own generation limits
+        self._clients: Dict[Tuple[str, str, str], OllamaClient] = {}
 
-    async def check_availability(self) -> bool:
-        """Checks if Ollama is reachable."""
-        if self._is_available is not None:
-            return self._is_available
+    def model_for(self, task: str) -> str:
+        """Model configured for a task in AI_TASK_MODELS, OLLAMA_MODEL otherwise."""
+        return settings.ai_task_models.get(task, self.model_name)
+
+    def _client(self, task: str, backend: Backend, model: str) -> OllamaClient:
+        key = (backend.base_url, task, model)
+        if key not in self._clients:
+            self._clients[key] = OllamaClient(
+                base_url=backend.base_url,
+                model=model,
+                options=TASK_OPTIONS[task],
+                timeout=self.request_timeout
+            )
+        return self._clients[key]
+
+    async def _generate(
+        self,
+        prompt: str,
+        task: str,
+        json_mode: bool = False,
+        num_predict: Optional[int] = None,
+        run: Optional[RankingRun] = None,
+        model: Optional[str] = None
+    ) -> str:
+        """
+        Runs a single LLM generation without blocking the event loop.
+        Uses the task's model (see model_for) unless a model is given.
+        The context window is sized to the prompt (see context_window_for).
+        num_predict overrides the task's output budget for prompts whose size varies.
+        Calls made as part of a RankingRun keep the model warm and report prompt timings to it.
+        Concurrent calls with the same (normalized) prompt share one generation.
+        Each call goes to the least loaded healthy host in the pool and waits for one of
+        its slots, interactive calls ahead of bulk ones (see llm_scheduler). Calls are
+        cancelled after AI_REQUEST_TIMEOUT_SECONDS (raises asyncio.TimeoutError).
+        Raises AIUnavailableError right away when no host is healthy.
+        """
+        model = model or self.model_for(task)
+        options = {}
+        if num_predict is not None:
+            options["num_predict"] = num_predict
+        num_predict = options.get("num_predict", TASK_OPTIONS[task].get("num_predict", 512))
+        stats = None
+        if run is not None:
+            options["num_ctx"] = run.context_window(prompt, num_predict)
+            options["keep_alive"] = run.keep_alive
+            options["stats"] = stats = GenerationStats()
+        else:
+            options["num_ctx"] = context_window_for(prompt, num_predict)
+
+        priority = current_priority()
+
+        async def generate() -> str:
+            tried: List[str] = []
+            while True:
+                backend = await self.pool.choose(exclude=tried)
+                try:
+                    async with self.pool.slot(backend, priority):
+                        # The breaker may have opened while this call was queued
+                        await backend.health.ensure_available()
+                        return await self._call_backend(backend, task, model, prompt, json_mode, options)
+                except (AIUnavailableError, httpx.ConnectError) as e:
+                    # Nothing was generated on that host, so another one can take the call
+                    tried.append(backend.base_url)
+                    if len(tried) >= len(self.pool):
+                        raise
+                    logger.warning(f"AI backend {backend.base_url} failed ({e}); retrying on another host")
+
+        key = generation_key(model, task, json_mode, num_predict, prompt)
+        response = await _in_flight.run(key, generate)
+        if run is not None:
+            # Only the call that actually generated fills in stats; joiners record nothing
+            run.record(prompt, stats)
+        return response
+
+    async def _generate_json(
+        self,
+        prompt: str,
+        task: str,
+        validate: Callable[[Dict[str, Any]], bool],
+        **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Runs a JSON-mode generation on the task's model and returns the parsed object,
+        or None if it is missing or fails validate. When the task runs on a smaller model
+        (AI_TASK_MODELS) and AI_MODEL_ESCALATION is on, invalid output is retried once on OLLAMA_MODEL.
+        """
+        model = self.model_for(task)
+        data = extract_json_object(await self._generate(prompt, task=task, json_mode=True, model=model, **kwargs))
+        if data is not None and validate(data):
+            return data
+        if not settings.AI_MODEL_ESCALATION or model == self.model_name:
+            return None
         
+        logger.info(f"{task}: output of {model} failed validation, escalating to {self.model_name}")
+        data = extract_json_object(await self._generate(prompt, task=task, json_mode=True, model=self.model_name, **kwargs))
+        return data if data is not None and validate(data) else None
+
+    async def _call_backend(
+        self,
+        backend: Backend,
+        task: str,
+        model: str,
+        prompt: str,
+        json_mode: bool,
+        options: Dict[str, Any]
+    ) -> str:
+        client = self._client(task, backend, model)
+        call = client.generate_json(prompt, **options) if json_mode else client.generate(prompt, **options)
+        started = time.monotonic()
         try:
-            async with httpx.AsyncClient(timeout=1.0) as client:
-                response = await client.get(f"{self.ollama_base_url}/api/tags")
-                self._is_available = response.status_code == 200
-        except Exception:
-            self._is_available = False
-        
-        if not self._is_available:
-            logger.warning("AI Service (Ollama) is not available. AI features will be limited.")
-        return self._is_available
+            response = await asyncio.wait_for(call, timeout=self.request_timeout)
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            self._record_failure(backend, started, e)
+            raise
+        backend.health.record_success()
+        backend.record(time.monotonic() - started, ok=True)
+        return response
+
+    @staticmethod
+    def _record_failure(backend: Backend, started: float, error: Exception) -> None:
+        # 4xx answers (e.g. an unknown model) do not mean the host is down
+        if not isinstance(error, httpx.HTTPStatusError) or error.response.status_code >= 500:
+            backend.health.record_failure()
+        backend.record(time.monotonic() - started, ok=False)
+
+    async def _stream(self, prompt: str, task: str) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of _generate: yields text as it is generated.
+        The host is chosen and its slot held as in _generate; a host that fails before
+        producing any text is swapped for another one. Stalls are bounded by the HTTP
+        read timeout (AI_REQUEST_TIMEOUT_SECONDS) rather than an overall deadline.
+        Closing the generator aborts the generation and frees the slot.
+        """
+        model = self.model_for(task)
+        options = {"num_ctx": context_window_for(prompt, TASK_OPTIONS[task].get("num_predict", 512))}
+        priority = current_priority()
+        tried: List[str] = []
+        while True:
+            backend = await self.pool.choose(exclude=tried)
+            produced = False
+            try:
+                async with self.pool.slot(backend, priority):
+                    await backend.health.ensure_available()
+                    client = self._client(task, backend, model)
+                    started = time.monotonic()
+                    try:
+                        async for piece in client.generate_stream(prompt, **options):
+                            produced = True
+                            yield piece
+                    except httpx.HTTPError as e:
+                        self._record_failure(backend, started, e)
+                        raise
+                    backend.health.record_success()
+                    backend.record(time.monotonic() - started, ok=True)
+                    return
+            except (AIUnavailableError, httpx.ConnectError) as e:
+                tried.append(backend.base_url)
+                if produced or len(tried) >= len(self.pool):
+                    raise
+                logger.warning(f"AI backend {backend.base_url} failed ({e}); retrying on another host")
+
+    async def keep_model_loaded(self, keep_alive: str) -> None:
+        """Loads the ranking model(s) on every host and sets their keep_alive; failures are only logged."""
+        async def load(backend: Backend, task: str) -> None:
+            try:
+                client = self._client(task, backend, self.model_for(task))
+                await asyncio.wait_for(client.load(keep_alive), timeout=self.request_timeout)
+            except Exception as e:
+                logger.warning(f"Could not set keep_alive={keep_alive} on {backend.base_url}: {e}")
+
+        # Both ranking tasks usually share a model; load each distinct one once
+        tasks = {self.model_for(task): task for task in ("rank_candidate", "rank_candidates_batch")}.values()
+        await asyncio.gather(*(load(backend, task) for backend in self.pool.backends for task in tasks))
+
+    async def check_availability(self) -> bool:
+        """Checks if any Ollama host is reachable (re-probed every AI_HEALTH_CHECK_TTL_SECONDS)."""
+        results = await asyncio.gather(*(backend.health.is_available() for backend in self.pool.backends))
+        return any(results)
 
     async def extract_text_from_file(self, file_path: str, mime_type: str = "application/pdf") -> str:
-        """Extracts text from PDF or plain text files."""
+        """
+        Extracts text from PDF or plain text files.
+        PDFs are parsed in a process pool, capped at PDF_MAX_PAGES pages,
+        RESUME_TEXT_MAX_CHARS characters and PDF_EXTRACT_TIMEOUT_SECONDS.
+        Results are cached by the SHA-256 of the file contents, so repeated
+        extractions and duplicate uploads skip the PDF parse.
+        """
         if not os.path.exists(file_path):
             logger.error(f"File not found: {file_path}")
             return ""
             
+        max_pages = settings.PDF_MAX_PAGES
+        max_chars = settings.RESUME_TEXT_MAX_CHARS
         try:
+            content_hash = await asyncio.to_thread(file_sha256, file_path)
+            # Limits are part of the key so changing them never serves shorter text
+            cache_key = f"{content_hash}-p{max_pages}-c{max_chars}"
+            # File I/O, and on writes the occasional eviction scan, stays off the event loop
+            cached = await asyncio.to_thread(_get_text_cache().get, cache_key)
+            if cached is not None:
+                return cached
+
             if "pdf" in mime_type or file_path.endswith(".pdf"):
-                text = ""
-                with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
-                        extracted = page.extract_text()
-                        if extracted:
-                            text += extracted + "\n"
-                return text
+                timeout = settings.PDF_EXTRACT_TIMEOUT_SECONDS
+                loop = asyncio.get_running_loop()
+                # The worker stops itself at the time budget; the outer timeout
+                # catches a single page that never finishes, and the pool is then
+                # recycled so the stuck worker does not keep its slot.
+                # Daemonic processes (Celery prefork workers) cannot spawn a pool;
+                # they are already off the API event loop, so a thread is enough there
+                # (a stuck thread cannot be killed; the task's own time limit applies).
+                executor = None if multiprocessing.current_process().daemon else _get_pdf_pool()
+                try:
+                    text, complete = await asyncio.wait_for(
+                        loop.run_in_executor(executor, extract_pdf_text, file_path, max_pages, max_chars, timeout),
+                        timeout=timeout + 5
+                    )
+                except asyncio.TimeoutError:
+                    if executor is not None:
+                        _reset_pdf_pool()
+                    raise
+                if not complete:
+                    # Partial text is usable now but must not be cached for good
+                    logger.warning(f"PDF extraction hit the time budget, text of {file_path} is incomplete")
+                    return text
             else:
                 # Fallback for text files
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    return f.read()
+                def read_text() -> str:
+                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                        return f.read(max_chars)
+                text = await asyncio.to_thread(read_text)
+
+            if text:
+                await asyncio.to_thread(_get_text_cache().set, cache_key, text)
+            return text
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out extracting text from {file_path}")
+            return ""
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {e}")
             return ""
 
     async def parse_resume(self, file_path: str, mime_type: str = "application/pdf") -> Dict[str, Any]:
-        """Parses resume text into structured JSON using LLM."""
-        if not await self.check_availability():
-            return {"error": "AI Service is currently offline. Structured data extraction skipped."}
-
+        """
+        Parses resume text into structured JSON.
+        Contact details, profile links and section names come from a rule-based pass
+        (resume_heuristics); the LLM is asked for the name and the fields that need reasoning,
+        over the resume's most useful sections packed into RESUME_PROMPT_TOKEN_BUDGET.
+        Skills found by the skill matcher are merged with the model's list (normalised
+        to canonical names). If the AI is offline the rule-based fields are returned
+        on their own, marked "ai_parsed": False.
+        """
         text = await self.extract_text_from_file(file_path, mime_type)
         if not text:
             return {"error": "Could not extract text from file"}
 
+        contact = extract_contact_details(text)
+        matcher = await asyncio.to_thread(get_skill_matcher)
+        found_skills = matcher.extract(text)
+        if found_skills:
+            contact["skills"] = found_skills
+        if not await self.check_availability():
+            logger.warning("AI Service is offline. Only rule-based resume fields were extracted.")
+            return {**contact, "ai_parsed": False}
+
+        resume_text = pack_resume_text(text, int(settings.RESUME_PROMPT_TOKEN_BUDGET * CHARS_PER_TOKEN))
+        
         prompt = f"""
         You are an expert technical recruiter. Analyze the following resume text and extract the key details into a structured JSON format.
         
@@ -83,8 +570,6 @@ class AIService:
         {{
             "first_name": "string",
             "last_name": "string",
-            "email": "string",
-            "phone": "string",
             "skills": ["string", "string"],
             "education": [
                 {{ "degree": "string", "institution": "string", "year": "string" }}
@@ -99,33 +584,38 @@ class AIService:
         }}
         
         Resume Text:
-        {text[:8000]}
+        {resume_text}
         """
         
         try:
-            if not self.llm:
-                 return {"error": "LLM not initialized"}
-                 
-            response = self.llm.invoke(prompt)
-            # Naive cleanup of response to finding JSON block
-            if not response:
-                return {"error": "AI returned empty response"}
-                
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx != -1:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                logger.warning(f"AI response did not contain JSON: {response}")
+            parsed = await self._generate_json(prompt, task="parse_resume", validate=valid_resume_data)
+            if parsed is None:
+                logger.warning("AI response did not contain valid resume JSON")
                 return {"error": "AI failed to generate structured JSON data"}
+            # Rule-based matches are exact, so they win over the model's reading
+            skills = matcher.normalize([*(parsed.get("skills") or []), *found_skills])
+            result = {**parsed, **contact, "skills": skills, "ai_parsed": True}
+            # Names need context (job titles and places also look like names), so the model's
+            # reading wins; the heuristic guess is kept only when the email corroborates it
+            if parsed.get("first_name"):
+                result["first_name"], result["last_name"] = parsed["first_name"], parsed.get("last_name")
+            elif not name_matches_email(contact.get("first_name"), contact.get("last_name"), contact.get("email")):
+                result.pop("first_name", None)
+                result.pop("last_name", None)
+            return result
+        except AIUnavailableError:
+            logger.warning("AI Service became unavailable. Only rule-based resume fields were extracted.")
+            return {**contact, "ai_parsed": False}
+        except asyncio.TimeoutError:
+            logger.error("LLM call for resume parsing timed out")
+            return {"error": "AI request timed out"}
         except Exception as e:
             logger.error(f"Error calling LLM for resume parsing: {e}")
             return {"error": str(e)}
 
-    async def generate_jd(self, title: str, skills: List[str], experience_min: int, experience_max: int) -> str:
-        """Generates a job description based on criteria."""
-        prompt = f"""
+    @staticmethod
+    def _jd_prompt(title: str, skills: List[str], experience_min: int, experience_max: int) -> str:
+        return f"""
         Write a compelling and professional Job Description for the following position:
         
         Role: {title}
@@ -147,42 +637,85 @@ class AIService:
         
         IMPORTANT: Return ONLY the content of the job description. Do NOT include any introductory text (like "Here is the JD") or concluding notes. Start directly with the first section header.
         """
-        response = self.llm.invoke(prompt)
-        
+
+    async def generate_jd(self, title: str, skills: List[str], experience_min: int, experience_max: int) -> str:
+        """Generates a job description based on criteria."""
+        response = await self._generate(self._jd_prompt(title, skills, experience_min, experience_max), task="generate_jd")
         # Post-processing to ensure no filler remains if the LLM slips up
-        # We expect the first line to start with '#'
-        lines = response.strip().split('\n')
-        start_index = 0
-        for i, line in enumerate(lines):
-            if line.strip().startswith('# '):
-                start_index = i
-                break
-        
-        # If we found a header, assume content starts there. 
-        # Also strip trailing notes (often starting with "Note:" or "Hope this helps")
-        cleaned_lines = lines[start_index:]
-        final_content = []
-        for line in reversed(cleaned_lines):
-            if line.strip().lower().startswith("note:") or "let me know" in line.lower():
-                continue
-            final_content.append(line)
-            
-        return '\n'.join(reversed(final_content)).strip()
+        return clean_job_description(response)
 
-    async def rank_candidate(self, job_description: str, candidate_profile_json: Dict) -> Dict[str, Any]:
-        """Compares candidate profile against JD and returns a score."""
-        candidate_summary = f"""
+    async def stream_jd(self, title: str, skills: List[str], experience_min: int, experience_max: int) -> AsyncIterator[str]:
+        """
+        Streams a job description as it is generated, cleaned line by line
+        exactly like generate_jd. Closing the generator cancels the generation.
+        """
+        cleaner = JDCleaner()
+        generation = self._stream(self._jd_prompt(title, skills, experience_min, experience_max), task="generate_jd")
+        try:
+            async for piece in generation:
+                text = cleaner.feed(piece)
+                if text:
+                    yield text
+        finally:
+            await generation.aclose()
+        text = cleaner.finish()
+        if text:
+            yield text
+
+    @staticmethod
+    def _candidate_summary(candidate_profile_json: Dict) -> str:
+        return f"""
         Skills: {', '.join(candidate_profile_json.get('skills', []))}
         Exp: {candidate_profile_json.get('total_experience_years', 0)} years
         """
+
+    @property
+    def ranking_version(self) -> str:
+        """Model(s) and prompt version behind a rank score; scores from another version are stale."""
+        models = dict.fromkeys(self.model_for(task) for task in ("rank_candidate", "rank_candidates_batch"))
+        return f"{'+'.join(models)}/v{RANK_PROMPT_VERSION}"
+
+    def ranking_fingerprints(self, job_description: str, candidate_profile_json: Dict) -> Dict[str, str]:
+        """
+        Fingerprints of everything a rank score depends on: the JD, the profile fields
+        the prompt uses and the model/prompt version. Stored on the Application, they let
+        a ranking run skip applications whose inputs are unchanged.
+        """
+        return {
+            "ai_jd_fingerprint": fingerprint(job_description),
+            "ai_profile_fingerprint": fingerprint(self._candidate_summary(candidate_profile_json)),
+            "ai_model_version": self.ranking_version,
+        }
+
+    def _rank_cache_key(self, job_description: str, candidate_summary: str, task: str = "rank_candidate") -> str:
+        # Identical JD + summary + model + prompt always yields a reusable score; the model
+        # is the one routed to the task that produced the score (AI_TASK_MODELS)
+        return fingerprint("|".join([
+            fingerprint(job_description),
+            fingerprint(candidate_summary),
+            self.model_for(task),
+            RANK_PROMPT_VERSION
+        ]))
+
+    async def rank_candidate(
+        self,
+        job_description: str,
+        candidate_profile_json: Dict,
+        run: Optional[RankingRun] = None
+    ) -> Dict[str, Any]:
+        """
+        Compares candidate profile against JD and returns a score.
+        Scores that could not be produced are 0 and marked "failed": True.
+        """
+        candidate_summary = self._candidate_summary(candidate_profile_json)
         
-        prompt = f"""
-        Act as a Hiring Manager. Evaluate the Candidate against the Job Description.
-        
-        Job Description:
-        {job_description[:4000]}
+        cache_key = self._rank_cache_key(job_description, candidate_summary)
+        # The cache is SQLite, keep its reads and writes off the event loop
+        cached = await asyncio.to_thread(_get_result_cache().get, cache_key)
+        if cached is not None:
+            return cached
         
-        Candidate Profile:
+        prompt = rank_prompt_prefix(job_description) + f"""Candidate Profile:
         {candidate_summary}
         
         Return ONLY valid JSON:
@@ -193,16 +726,115 @@ class AIService:
         """
         
         try:
-            response = self.llm.invoke(prompt)
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1:
-                return json.loads(response[start_idx:end_idx])
-            else:
-                return {"score": 0, "reasoning": "Parsing Error"}
+            result = await self._generate_json(prompt, task="rank_candidate", validate=valid_rank_result, run=run)
+            if result is None:
+                return {"score": 0, "reasoning": "Parsing Error", "failed": True}
+            await asyncio.to_thread(_get_result_cache().set, cache_key, result)
+            return result
+        except asyncio.TimeoutError:
+            logger.error("LLM call for candidate ranking timed out")
+            return {"score": 0, "reasoning": "AI Error: request timed out", "failed": True}
         except Exception as e:
             logger.error(f"Error ranking candidate: {e}")
-            return {"score": 0, "reasoning": f"AI Error: {e}"}
+            return {"score": 0, "reasoning": f"AI Error: {e}", "failed": True}
+
+    async def rank_candidates_batch(
+        self,
+        job_description: str,
+        candidate_profiles: List[Dict],
+        run: Optional[RankingRun] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Scores several candidates against one JD in a single LLM call, so the JD
+        is only read once. Returns one result per profile, in order.
+        Cached scores are reused. The batch output is only trusted when it numbers the
+        candidates exactly 1..n; otherwise every candidate is re-ranked one by one with
+        rank_candidate, so no score lands on the wrong candidate.
+        """
+        summaries = [self._candidate_summary(profile) for profile in candidate_profiles]
+        cache_keys = [self._rank_cache_key(job_description, summary, "rank_candidates_batch") for summary in summaries]
+        single_keys = [self._rank_cache_key(job_description, summary) for summary in summaries]
+        cache = _get_result_cache()
+        # Scores from rank_candidate (e.g. earlier fallbacks) are as good as batch scores
+        results: List[Optional[Dict[str, Any]]] = await asyncio.to_thread(
+            lambda: [cache.get(key) or cache.get(single) for key, single in zip(cache_keys, single_keys)]
+        )
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        if len(pending) > 1:
+            candidates_block = "\n".join(
+                f"Candidate {n}:{summaries[i]}" for n, i in enumerate(pending, start=1)
+            )
+            prompt = rank_prompt_prefix(job_description) + f"""Candidates:
+        {candidates_block}
+        
+        Return ONLY valid JSON with one entry per candidate:
+        {{
+            "results": [
+                {{"id": number (candidate number), "score": number (0-100), "reasoning": "string (max 50 words explaining the score)"}}
+            ]
+        }}
+        """
+            try:
+                # Roughly 100 output tokens per candidate plus the JSON envelope
+                response = await self._generate(
+                    prompt, task="rank_candidates_batch", json_mode=True,
+                    num_predict=64 + 120 * len(pending), run=run
+                )
+                entries = self._parse_batch_results(response, len(pending))
+                if entries is None:
+                    logger.warning(f"Batched ranking output did not number candidates 1..{len(pending)}; discarding it")
+                else:
+                    fresh = {}
+                    for n, entry in entries.items():
+                        i = pending[n - 1]
+                        results[i] = entry
+                        fresh[cache_keys[i]] = entry
+                    await asyncio.to_thread(lambda: [cache.set(key, entry) for key, entry in fresh.items()])
+            except asyncio.TimeoutError:
+                logger.error("LLM call for batched candidate ranking timed out")
+            except Exception as e:
+                logger.error(f"Error ranking candidate batch: {e}")
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            if len(pending) > 1:
+                logger.warning(f"Batched ranking returned no usable result for {len(missing)} of {len(pending)} candidates; ranking them individually")
+            fallback = await asyncio.gather(*(
+                self.rank_candidate(job_description, candidate_profiles[i], run=run) for i in missing
+            ))
+            for i, result in zip(missing, fallback):
+                results[i] = result
+        return results
+
+    @staticmethod
+    def _parse_batch_results(response: str, expected: int) -> Optional[Dict[int, Dict[str, Any]]]:
+        """
+        Maps candidate number -> {"score", "reasoning"}. Returns None unless the output
+        has exactly one well-formed entry for each number 1..expected: a model that
+        numbers from 0, skips or repeats an id would otherwise shift scores onto other candidates.
+        """
+        data = extract_json_object(response)
+        entries = data.get("results") if data else None
+        if not isinstance(entries, list) or len(entries) != expected:
+            return None
+        
+        parsed = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                return None
+            try:
+                n = int(entry["id"])
+                score = float(entry["score"])
+            except (KeyError, TypeError, ValueError):
+                return None
+            if n in parsed or not 1 <= n <= expected:
+                return None
+            parsed[n] = {
+                "score": int(score) if score.is_integer() else score,
+                "reasoning": str(entry.get("reasoning") or "No explanation provided")
+            }
+        return parsed
 
     async def summarize_jd_for_image(self, job_description: str) -> Dict[str, Any]:
         """Summarizes a JD into a structured format for a professional hiring image."""
@@ -225,11 +857,9 @@ class AIService:
         Do NOT include any markdown or explanatory text.
         """
         try:
-            response = self.llm.invoke(prompt)
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1:
-                return json.loads(response[start_idx:end_idx])
+            summary = await self._generate_json(prompt, task="summarize_jd", validate=valid_poster_summary)
+            if summary is not None:
+                return summary
             return {"job_title": "We Are Hiring", "requirements": []}
         except Exception as e:
             logger.error(f"Error summarizing JD for image: {e}")
@@ -0,0 +1,131 @@
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from core.config import settings
+from application.services.llm_scheduler import Priority, PrioritySemaphore
+from application.services.ollama_health import AIUnavailableError, OllamaHealth, get_ollama_health
+
+logger = logging.getLogger(__name__)
+
+
+def bulk_slots_for(capacity: int) -> int:
+    """LLM slots bulk work may hold on one host; by default one is left free for interactive calls."""
+    capacity = max(1, capacity)
+    bulk_limit = settings.AI_BULK_MAX_CONCURRENT_REQUESTS or capacity - 1
+    return max(1, min(bulk_limit, capacity))
+
+
+class Backend:
+    """One Ollama server in the pool, with its own slots, health state and latency stats."""
+
+    def __init__(self, base_url: str, weight: float = 1.0, max_concurrency: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+        self.weight = max(weight, 0.01)
+        self.max_concurrency = max(1, max_concurrency or settings.AI_MAX_CONCURRENT_REQUESTS)
+        self.bulk_slots = bulk_slots_for(self.max_concurrency)
+        self.semaphore = PrioritySemaphore(
+            capacity=self.max_concurrency,
+            bulk_limit=self.bulk_slots,
+            bulk_per_minute=settings.AI_BULK_MAX_REQUESTS_PER_MINUTE
+        )
+        self.health: OllamaHealth = get_ollama_health(self.base_url)
+        self.outstanding = 0  # Queued on this host plus running
+        self.requests = 0
+        self.failures = 0
+        self._latencies: Deque[float] = deque(maxlen=200)
+
+    @property
+    def load(self) -> float:
+        return (self.outstanding + 1) / self.weight
+
+    @property
+    def avg_latency(self) -> Optional[float]:
+        return sum(self._latencies) / len(self._latencies) if self._latencies else None
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.requests += 1
+        if ok:
+            self._latencies.append(seconds)
+        else:
+            self.failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None
+        return {
+            "url": self.base_url,
+            "weight": self.weight,
+            "max_concurrency": self.max_concurrency,
+            "state": self.health.state,
+            "outstanding": self.outstanding,
+            "running": self.semaphore.in_use,
+            "queued": self.semaphore.waiting,
+            "requests": self.requests,
+            "failures": self.failures,
+            "avg_latency_seconds": round(self.avg_latency, 3) if latencies else None,
+            "p95_latency_seconds": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class BackendPool:
+    """
+    Spreads LLM calls over every configured Ollama server (OLLAMA_HOSTS).
+    Each call goes to the healthy host with the fewest outstanding requests
+    relative to its weight; hosts whose circuit breaker is open are skipped
+    until their reset time has passed and a probe succeeds.
+    """
+
+    def __init__(self, backends: Iterable[Backend]):
+        self.backends: List[Backend] = list(backends)
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    @property
+    def bulk_capacity(self) -> int:
+        return sum(backend.bulk_slots for backend in self.backends)
+
+    async def choose(self, exclude: Iterable[str] = ()) -> Backend:
+        """Least outstanding (weighted) healthy host; ties go to the faster one."""
+        excluded = set(exclude)
+        eligible = []
+        for backend in self.backends:
+            if backend.base_url in excluded:
+                continue
+            state = backend.health.state
+            # A half-open host is probed here so it can rejoin the rotation
+            if state == "closed" or (state == "half-open" and await backend.health.is_available()):
+                eligible.append(backend)
+        if not eligible:
+            raise AIUnavailableError("No AI backend is available")
+        return min(eligible, key=lambda backend: (backend.load, backend.avg_latency or 0.0))
+
+    @asynccontextmanager
+    async def slot(self, backend: Backend, priority: Priority):
+        """Holds one of the backend's slots; outstanding counts the wait as well."""
+        backend.outstanding += 1
+        try:
+            async with backend.semaphore.slot(priority):
+                yield backend
+        finally:
+            backend.outstanding -= 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [backend.stats() for backend in self.backends]
+
+
+_pool: Optional[BackendPool] = None
+
+
+def get_backend_pool() -> BackendPool:
+    """Process-wide pool built from settings, shared by every AIService instance."""
+    global _pool
+    if _pool is None:
+        _pool = BackendPool(
+            Backend(config["url"], weight=config["weight"], max_concurrency=config["max_concurrency"])
+            for config in settings.ollama_backends
+        )
+        logger.info(f"AI backend pool: {[backend.base_url for backend in _pool.backends]}")
+    return _pool
@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from core.config import settings
+from application.services.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+# Loaded models and the on-disk index are shared by every EmbeddingService instance.
+_models: Dict[str, Any] = {}
+_failed_models: set = set()
+_candidate_index: Optional[VectorIndex] = None
+_posting_index: Optional[VectorIndex] = None
+
+
+def get_candidate_index() -> VectorIndex:
+    global _candidate_index
+    if _candidate_index is None:
+        _candidate_index = VectorIndex("candidates")
+    return _candidate_index
+
+
+def get_posting_index() -> VectorIndex:
+    global _posting_index
+    if _posting_index is None:
+        _posting_index = VectorIndex("job_postings")
+    return _posting_index
+
+
+class EmbeddingService:
+    """
+    Sentence-transformer embeddings for candidate profiles and job postings.
+    Used to cheaply pre-filter the candidate pool before any LLM ranking.
+    """
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.model_name = model_name or settings.RESUME_PARSING_MODEL
+
+    def fingerprint(self, text: str) -> str:
+        """Identifies an embedding by model and input text, so either changing invalidates it."""
+        return hashlib.sha256(f"{self.model_name}\n{text}".encode("utf-8")).hexdigest()
+
+    def _get_model(self):
+        if self.model_name in _models:
+            return _models[self.model_name]
+        if self.model_name in _failed_models:
+            return None
+        try:
+            from sentence_transformers import SentenceTransformer
+            _models[self.model_name] = SentenceTransformer(self.model_name, cache_folder=settings.AI_MODEL_PATH)
+            return _models[self.model_name]
+        except Exception as e:
+            logger.warning(f"Embedding model {self.model_name} unavailable, pre-filtering disabled: {e}")
+            _failed_models.add(self.model_name)
+            return None
+
+    def _encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        model = self._get_model()
+        if model is None:
+            return None
+        embeddings = model.encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return embeddings.astype(np.float32)
+
+    async def embed(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Returns an (n, dim) matrix of L2-normalised embeddings, or None if the model is unavailable."""
+        if not texts:
+            return None
+        # Encoding is CPU-bound, keep it off the event loop
+        return await asyncio.to_thread(self._encode, texts)
+
+    async def similarities(self, query_text: str, texts: List[str]) -> Optional[np.ndarray]:
+        """Cosine similarity of query_text against every entry of texts."""
+        embeddings = await self.embed([query_text] + texts)
+        if embeddings is None:
+            return None
+        return embeddings[1:] @ embeddings[0]
+
+    @staticmethod
+    def candidate_profile_text(candidate: Any) -> str:
+        """Flattens the parts of a candidate profile that matter for matching into one string."""
+        parsed = candidate.resume_parsed_data or {}
+        parts = []
+        designation = candidate.current_designation or parsed.get("current_designation")
+        if designation:
+            parts.append(designation)
+        skills = candidate.skills or parsed.get("skills") or []
+        if skills:
+            parts.append("Skills: " + ", ".join(str(skill) for skill in skills))
+        experience = candidate.total_experience_years or parsed.get("total_experience_years")
+        if experience:
+            parts.append(f"{experience} years of experience")
+        for job in parsed.get("experience") or []:
+            if isinstance(job, dict):
+                parts.append(" ".join(str(job.get(key, "")) for key in ("role", "company", "description")).strip())
+        education = candidate.highest_education or parsed.get("highest_education")
+        if education:
+            parts.append(education)
+        return "\n".join(part for part in parts if part)
+
+    @staticmethod
+    def job_posting_text(job_posting: Any) -> str:
+        return "\n".join(
+            part for part in (job_posting.title, job_posting.description, job_posting.requirements) if part
+        )
+
+    async def candidate_vectors(self, candidates: List[Any]) -> Dict[str, np.ndarray]:
+        """
+        Returns {candidate_id: embedding} for every candidate with profile text.
+        Vectors come from the persistent index; missing or stale ones are embedded
+        in one batch. Only active, non-blacklisted candidates are written back.
+        """
+        index = get_candidate_index()
+        by_key = {str(candidate.id): candidate for candidate in candidates}
+        texts = {key: self.candidate_profile_text(candidate) for key, candidate in by_key.items()}
+        texts = {key: text for key, text in texts.items() if text}
+        if not texts:
+            return {}
+
+        wanted = {key: self.fingerprint(text) for key, text in texts.items()}
+        # Index I/O (file lock, SQLite, memory map) is blocking, keep it off the event loop
+        stored = await asyncio.to_thread(index.fingerprints, list(wanted))
+        stale = [key for key, fingerprint in wanted.items() if stored[key] != fingerprint]
+        fresh: Dict[str, np.ndarray] = {}
+        if stale:
+            embeddings = await self.embed([texts[key] for key in stale])
+            if embeddings is None:
+                return {}
+            fresh = dict(zip(stale, embeddings))
+            await asyncio.to_thread(index.upsert, [
+                (key, wanted[key], fresh[key]) for key in stale
+                if by_key[key].is_active and not by_key[key].is_blacklisted
+            ])
+
+        keys, matrix = await asyncio.to_thread(index.get_vectors, [key for key in wanted if key not in fresh])
+        vectors = dict(zip(keys, matrix)) if matrix is not None else {}
+        vectors.update(fresh)
+        return vectors
+
+    def stored_candidate_vectors(self, candidate_ids: Iterable[Any]) -> Dict[str, np.ndarray]:
+        """
+        {candidate_id: embedding} straight from the persistent index. Nothing is embedded,
+        so this is cheap, but profiles edited since they were indexed keep their old vector.
+        """
+        keys, matrix = get_candidate_index().get_vectors([str(candidate_id) for candidate_id in candidate_ids])
+        return dict(zip(keys, matrix)) if matrix is not None else {}
+
+    async def index_candidate(self, candidate: Any) -> None:
+        """
+        Keeps the persistent index in step with a candidate profile: (re)embeds active
+        candidates whose profile changed and drops inactive or blacklisted ones.
+        """
+        try:
+            if not candidate.is_active or candidate.is_blacklisted:
+                await self.remove_candidate(candidate.id)
+                return
+            text = self.candidate_profile_text(candidate)
+            if not text:
+                await self.remove_candidate(candidate.id)
+                return
+            await self.candidate_vectors([candidate])
+        except Exception as e:
+            logger.warning(f"Failed to update embedding index for candidate {candidate.id}: {e}")
+
+    async def remove_candidate(self, candidate_id: Any) -> None:
+        try:
+            await asyncio.to_thread(get_candidate_index().remove, [str(candidate_id)])
+        except Exception as e:
+            logger.warning(f"Failed to remove candidate {candidate_id} from embedding index: {e}")
+
+    async def posting_vectors(self, job_postings: List[Any]) -> Dict[str, np.ndarray]:
+        """
+        Returns {job_posting_id: embedding}, reading the persistent posting index and
+        embedding new or edited postings in one batch. Callers pass open postings only;
+        everything embedded here is written back.
+        """
+        index = get_posting_index()
+        texts = {str(posting.id): self.job_posting_text(posting) for posting in job_postings}
+        texts = {key: text for key, text in texts.items() if text}
+        if not texts:
+            return {}
+
+        wanted = {key: self.fingerprint(text) for key, text in texts.items()}
+        stored = await asyncio.to_thread(index.fingerprints, list(wanted))
+        stale = [key for key, fingerprint in wanted.items() if stored[key] != fingerprint]
+        fresh: Dict[str, np.ndarray] = {}
+        if stale:
+            embeddings = await self.embed([texts[key] for key in stale])
+            if embeddings is None:
+                return {}
+            fresh = dict(zip(stale, embeddings))
+            await asyncio.to_thread(index.upsert, [(key, wanted[key], fresh[key]) for key in stale])
+
+        keys, matrix = await asyncio.to_thread(index.get_vectors, [key for key in wanted if key not in fresh])
+        vectors = dict(zip(keys, matrix)) if matrix is not None else {}
+        vectors.update(fresh)
+        return vectors
+
+    async def index_job_posting(self, job_posting: Any) -> None:
+        """Keeps the posting index in step with a posting: (re)embeds open postings, drops closed ones."""
+        try:
+            if not job_posting.is_active:
+                await self.remove_job_posting(job_posting.id)
+                return
+            await self.posting_vectors([job_posting])
+        except Exception as e:
+            logger.warning(f"Failed to update embedding index for job posting {job_posting.id}: {e}")
+
+    async def remove_job_posting(self, job_posting_id: Any) -> None:
+        try:
+            await asyncio.to_thread(get_posting_index().remove, [str(job_posting_id)])
+        except Exception as e:
+            logger.warning(f"Failed to remove job posting {job_posting_id} from embedding index: {e}")
+
+    def prune_job_postings(self, open_ids: Iterable[Any]) -> int:
+        """Drops every indexed posting not in open_ids (e.g. expired by date); returns how many."""
+        index = get_posting_index()
+        keep = {str(posting_id) for posting_id in open_ids}
+        closed = [key for key in index.keys() if key not in keep]
+        index.remove(closed)
+        return len(closed)
+
+    async def profile_vector(self, candidate: Any) -> Optional[np.ndarray]:
+        """
+        The candidate's embedding, read off the index when its fingerprint is current;
+        the profile is only re-embedded (and written back) when it changed since.
+        """
+        text = self.candidate_profile_text(candidate)
+        if not text:
+            return None
+        key, fingerprint = str(candidate.id), self.fingerprint(text)
+        index = get_candidate_index()
+
+        def stored_vector() -> Optional[np.ndarray]:
+            if index.fingerprints([key])[key] != fingerprint:
+                return None
+            keys, matrix = index.get_vectors([key])
+            return matrix[0] if keys else None
+
+        vector = await asyncio.to_thread(stored_vector)
+        if vector is None:
+            vector = (await self.candidate_vectors([candidate])).get(key)
+        return vector
+
+    async def similar_candidates(self, candidate: Any, k: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        The k indexed candidates nearest to this candidate's profile, as
+        [(candidate_id, cosine similarity)], best first; None if the profile cannot be embedded.
+        """
+        vector = await self.profile_vector(candidate)
+        if vector is None:
+            return None
+        return await asyncio.to_thread(get_candidate_index().search, vector, k, [str(candidate.id)])
+
+    async def recommended_postings(self, candidate: Any, k: int) -> Optional[List[Tuple[str, float]]]:
+        """The k indexed job postings nearest to this candidate's profile, like similar_candidates."""
+        vector = await self.profile_vector(candidate)
+        if vector is None:
+            return None
+        return await asyncio.to_thread(get_posting_index().search, vector, k)
+
+    async def prefilter_candidates(self, query_text: str, candidates: List[Any], top_k: int) -> List[Any]:
+        """
+        Keeps the top_k candidates most similar to query_text.
+        Candidates without any profile text are always kept, since they need resume
+        parsing before they can be judged. Returns every candidate if embeddings are unavailable.
+        """
+        if top_k <= 0 or len(candidates) <= top_k:
+            return candidates
+
+        try:
+            vectors = await self.candidate_vectors(candidates)
+            query = await self.embed([query_text])
+        except Exception as e:
+            logger.warning(f"Embedding pre-filter failed, ranking every candidate: {e}")
+            return candidates
+        if query is None or len(vectors) <= top_k:
+            return candidates
+
+        keys = list(vectors.keys())
+        scores = np.stack([vectors[key] for key in keys]) @ query[0]
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        keep = {keys[i] for i in top}
+        return [candidate for candidate in candidates if str(candidate.id) in keep or str(candidate.id) not in vectors]
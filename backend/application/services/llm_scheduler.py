@@ -0,0 +1,132 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import Deque, List, Optional, Tuple
+
+
+class Priority(IntEnum):
+    """LLM work classes; lower values are served first."""
+    INTERACTIVE = 0  # A user is waiting on the response
+    BULK = 1  # Ranking runs and background parsing
+
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """
+    Runs the enclosed code (and any tasks it creates) with the given LLM priority.
+    Tasks copy the context when created, so workers started inside inherit it.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class PrioritySemaphore:
+    """
+    Concurrency limiter for one Ollama host that hands free slots to waiters by
+    priority class, FIFO within a class, so interactive calls jump ahead of queued bulk work.
+    Bulk work may additionally hold at most bulk_limit slots at once (leaving the rest
+    for interactive calls) and start at most bulk_per_minute calls per minute (0 = unlimited).
+    """
+
+    def __init__(self, capacity: int, bulk_limit: int, bulk_per_minute: int = 0):
+        self.capacity = max(1, capacity)
+        self.bulk_limit = max(1, min(bulk_limit, self.capacity))
+        self.bulk_per_minute = bulk_per_minute
+        self.in_use = 0
+        self.bulk_in_use = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._bulk_starts: Deque[float] = deque()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    async def acquire(self, priority: Priority) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the cancellation landed; hand the slot back
+                self.release(priority)
+            else:
+                self._dispatch()
+            raise
+
+    def release(self, priority: Priority) -> None:
+        self.in_use -= 1
+        if priority == Priority.BULK:
+            self.bulk_in_use -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_use >= self.capacity:
+                return
+            if priority == Priority.BULK:
+                # Everything still queued is bulk, so nothing else can start either
+                if self.bulk_in_use >= self.bulk_limit:
+                    return
+                delay = self._bulk_rate_delay()
+                if delay > 0:
+                    self._schedule_wakeup(delay)
+                    return
+                self.bulk_in_use += 1
+                self._bulk_starts.append(time.monotonic())
+            heapq.heappop(self._waiters)
+            self.in_use += 1
+            future.set_result(None)
+
+    def _bulk_rate_delay(self) -> float:
+        if self.bulk_per_minute <= 0:
+            return 0.0
+        now = time.monotonic()
+        while self._bulk_starts and now - self._bulk_starts[0] >= 60.0:
+            self._bulk_starts.popleft()
+        if len(self._bulk_starts) < self.bulk_per_minute:
+            return 0.0
+        return self._bulk_starts[0] + 60.0 - now
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._wakeup is not None and self._wakeup.when() <= when:
+            return
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        self._wakeup = loop.call_at(when, self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup = None
+        self._dispatch()
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Query, Session, joinedload
+
+from core.config import settings
+from infrastructure.database.connection import SessionLocal
+from infrastructure.database.models import Candidate, CandidateJobMatch, JobPosting
+from application.services.embedding_service import EmbeddingService
+from application.services.match_scorer import CandidateFeatures, FastMatchScorer, JobRequirements
+from application.services.skill_matcher import get_skill_matcher
+
+logger = logging.getLogger(__name__)
+
+_TERMINAL_STATES = ("Cancelled", "Rejected", "Expired")
+
+
+def active_posting_filters() -> Tuple[Any, ...]:
+    """SQL criteria for job postings whose status is "Active" (see JobPosting.status)."""
+    return (
+        JobPosting.is_active == True,
+        or_(JobPosting.expires_at == None, JobPosting.expires_at > datetime.utcnow()),
+        or_(JobPosting.status_state == None, JobPosting.status_state.notin_(_TERMINAL_STATES))
+    )
+
+
+def active_postings_query(db: Session) -> Query:
+    """Active job postings, with their requisitions."""
+    return db.query(JobPosting).options(joinedload(JobPosting.requisition)).filter(*active_posting_filters())
+
+
+def _top_matches(
+    postings: List[Any],
+    features: CandidateFeatures,
+    scorer: FastMatchScorer,
+    jobs: List[JobRequirements],
+    job_vectors: List[Any]
+) -> Dict[Tuple[int, int], List[Any]]:
+    """
+    Scores every posting against every candidate and keeps, as
+    {(posting index, candidate row): [score, posting_rank, candidate_rank]},
+    the top MATCH_MATRIX_CANDIDATES_PER_POSTING candidates of each posting and the
+    top MATCH_MATRIX_POSTINGS_PER_CANDIDATE postings of each candidate.
+    Only one row of scores is held at a time; per-candidate bests are kept in an (n, K) buffer.
+    """
+    n = len(features)
+    per_posting = settings.MATCH_MATRIX_CANDIDATES_PER_POSTING
+    per_candidate = min(settings.MATCH_MATRIX_POSTINGS_PER_CANDIDATE, len(postings))
+    min_score = settings.MATCH_MATRIX_MIN_SCORE
+    rows = np.arange(n)
+    best_scores = np.full((n, per_candidate), -1.0, dtype=np.float32)
+    best_postings = np.full((n, per_candidate), -1, dtype=np.int32)
+    matches: Dict[Tuple[int, int], List[Any]] = {}
+
+    for j in range(len(postings)):
+        scores = scorer.score(jobs[j], features, job_vectors[j])
+        eligible = np.flatnonzero(scores >= min_score)
+        top = eligible[np.argsort(-scores[eligible], kind="stable")[:per_posting]]
+        for rank, i in enumerate(top, start=1):
+            matches[(j, int(i))] = [float(scores[i]), rank, None]
+
+        # Replace each candidate's weakest kept posting if this one scores higher
+        weakest = best_scores.argmin(axis=1)
+        better = np.flatnonzero((scores > best_scores[rows, weakest]) & (scores >= min_score))
+        best_scores[better, weakest[better]] = scores[better]
+        best_postings[better, weakest[better]] = j
+
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    for i in range(n):
+        for rank, slot in enumerate(order[i], start=1):
+            j = int(best_postings[i, slot])
+            if j < 0:
+                break
+            match = matches.setdefault((j, i), [float(best_scores[i, slot]), None, None])
+            match[2] = rank
+    return matches
+
+
+async def compute_match_matrix(db: Session, embedding_service: Optional[EmbeddingService] = None) -> Dict[str, Any]:
+    """
+    Rebuilds the candidate_job_matches table: every active, non-blacklisted candidate is
+    scored against every active job posting with the fast scorer, and only the top
+    matches on both sides are stored. The table is replaced in one transaction, so
+    readers see either the previous or the new matrix.
+    """
+    started = time.monotonic()
+    embedding_service = embedding_service or EmbeddingService()
+    candidates = db.query(Candidate).filter(
+        Candidate.is_active == True,
+        Candidate.is_blacklisted == False
+    ).all()
+    postings = active_postings_query(db).all()
+
+    # Also resyncs the posting embedding index used by recommended jobs, dropping postings that closed
+    try:
+        posting_vectors = await embedding_service.posting_vectors(postings)
+        await asyncio.to_thread(embedding_service.prune_job_postings, [posting.id for posting in postings])
+    except Exception as e:
+        logger.warning(f"Job posting embedding index not refreshed: {e}")
+        posting_vectors = {}
+
+    matches: Dict[Tuple[int, int], List[Any]] = {}
+    if candidates and postings:
+        matcher = await asyncio.to_thread(get_skill_matcher)
+        scorer = FastMatchScorer(matcher)
+        try:
+            vectors = await asyncio.to_thread(
+                embedding_service.stored_candidate_vectors, [candidate.id for candidate in candidates]
+            )
+        except Exception as e:
+            logger.warning(f"Embedding index unavailable, match matrix computed without similarity: {e}")
+            vectors = {}
+        features = CandidateFeatures.build(candidates, matcher, vectors)
+        jobs = [JobRequirements.from_posting(posting, matcher) for posting in postings]
+        job_vectors: List[Any] = [None] * len(postings)
+        if vectors:
+            job_vectors = [posting_vectors.get(str(posting.id)) for posting in postings]
+        matches = await asyncio.to_thread(_top_matches, postings, features, scorer, jobs, job_vectors)
+
+    computed_at = datetime.utcnow()
+    db.query(CandidateJobMatch).delete(synchronize_session=False)
+    db.bulk_insert_mappings(CandidateJobMatch, [
+        {
+            "job_posting_id": postings[j].id,
+            "candidate_id": candidates[i].id,
+            "score": round(score, 2),
+            "posting_rank": posting_rank,
+            "candidate_rank": candidate_rank,
+            "computed_at": computed_at,
+        }
+        for (j, i), (score, posting_rank, candidate_rank) in matches.items()
+    ])
+    db.commit()
+
+    stats = {
+        "candidates": len(candidates),
+        "postings": len(postings),
+        "matches": len(matches),
+        "seconds": round(time.monotonic() - started, 2),
+    }
+    logger.info(f"Match matrix rebuilt: {stats}")
+    return stats
+
+
+async def run_match_matrix_job() -> Dict[str, Any]:
+    """Entry point for the scheduled task and the in-process fallback; uses its own session."""
+    db = SessionLocal()
+    try:
+        return await compute_match_matrix(db)
+    finally:
+        db.close()
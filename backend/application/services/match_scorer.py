@@ -0,0 +1,274 @@
+"""
+Deterministic, LLM-free candidate/job match scores computed with NumPy.
+Candidate features are extracted once; every job is then scored against the
+whole set in a few vectorised operations.
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from application.services.skill_matcher import SkillMatcher, get_skill_matcher
+
+logger = logging.getLogger(__name__)
+
+# Stored as Application.ai_model_version for fast-mode scores
+FAST_SCORER_VERSION = "fast/v1"
+
+# Relative weight of each component; components that cannot be computed for a
+# job or candidate (no skills listed, no location, no embedding...) are left out
+# and the remaining weights rescaled
+FAST_SCORE_WEIGHTS: Dict[str, float] = {
+    "required_skills": 0.45,
+    "preferred_skills": 0.10,
+    "experience": 0.20,
+    "location": 0.05,
+    "similarity": 0.20,
+}
+COMPONENTS = tuple(FAST_SCORE_WEIGHTS)
+
+# Each year beyond experience_max costs this much of the experience component, down to the floor
+OVERQUALIFIED_PENALTY_PER_YEAR = 0.1
+OVERQUALIFIED_FLOOR = 0.5
+
+
+def _location_key(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+@dataclass
+class JobRequirements:
+    """What a job asks for, with skills in canonical form."""
+    required_skills: List[str]
+    preferred_skills: List[str]
+    experience_min: Optional[float]
+    experience_max: Optional[float]
+    location: Optional[str]
+
+    @classmethod
+    def from_posting(cls, job_posting: Any, matcher: SkillMatcher) -> "JobRequirements":
+        """
+        Skills come from the posting's requisition (required_skills/preferred_skills);
+        without any, they are extracted from the posting text.
+        """
+        requisition = getattr(job_posting, "requisition", None)
+        required = matcher.normalize((requisition.required_skills or []) if requisition else [])
+        preferred = matcher.normalize((requisition.preferred_skills or []) if requisition else [])
+        if not required:
+            required = matcher.extract("\n".join(
+                part for part in (job_posting.title, job_posting.description, job_posting.requirements) if part
+            ))
+        required_keys = {skill.lower() for skill in required}
+        preferred = [skill for skill in preferred if skill.lower() not in required_keys]
+
+        experience_min = job_posting.experience_min
+        experience_max = job_posting.experience_max
+        if experience_min is None and experience_max is None and requisition is not None:
+            experience_min, experience_max = requisition.experience_min, requisition.experience_max
+        location = job_posting.location or (requisition.location if requisition else None)
+        return cls(
+            required_skills=required,
+            preferred_skills=preferred,
+            experience_min=float(experience_min) if experience_min is not None else None,
+            experience_max=float(experience_max) if experience_max is not None else None,
+            location=location
+        )
+
+
+@dataclass
+class CandidateFeatures:
+    """
+    Column-oriented candidate data for vectorised scoring. Skills are stored as
+    postings (canonical skill -> row indices), so a job's skill overlap costs one
+    scatter-add per job skill instead of a loop over candidates.
+    """
+    ids: List[str]
+    experience: np.ndarray  # Years; NaN if unknown
+    location_codes: np.ndarray  # Index into locations per row
+    locations: List[str]  # Distinct "current|preferred" location keys
+    skill_postings: Dict[str, np.ndarray]
+    skills: List[List[str]]
+    embeddings: Optional[np.ndarray] = None  # (n, dim), zero rows where missing
+    has_embedding: Optional[np.ndarray] = None
+    index: Dict[str, int] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        candidates: Sequence[Any],
+        matcher: SkillMatcher,
+        vectors: Optional[Dict[str, np.ndarray]] = None
+    ) -> "CandidateFeatures":
+        ids = [str(candidate.id) for candidate in candidates]
+        experience = np.full(len(candidates), np.nan, dtype=np.float32)
+        location_lookup: Dict[str, int] = {}
+        location_codes = np.zeros(len(candidates), dtype=np.int32)
+        postings: Dict[str, List[int]] = {}
+        skills: List[List[str]] = []
+
+        for row, candidate in enumerate(candidates):
+            parsed = candidate.resume_parsed_data or {}
+            years = candidate.total_experience_years
+            if years is None:
+                years = parsed.get("total_experience_years")
+            try:
+                if years is not None:
+                    experience[row] = float(years)
+            except (TypeError, ValueError):
+                pass
+
+            key = f"{_location_key(candidate.current_location)}|{_location_key(candidate.preferred_location)}"
+            location_codes[row] = location_lookup.setdefault(key, len(location_lookup))
+
+            candidate_skills = matcher.normalize(candidate.skills or parsed.get("skills") or [])
+            skills.append(candidate_skills)
+            for skill in candidate_skills:
+                postings.setdefault(skill.lower(), []).append(row)
+
+        features = cls(
+            ids=ids,
+            experience=experience,
+            location_codes=location_codes,
+            locations=list(location_lookup),
+            skill_postings={skill: np.asarray(rows, dtype=np.int64) for skill, rows in postings.items()},
+            skills=skills,
+            index={key: row for row, key in enumerate(ids)}
+        )
+        if vectors:
+            dim = len(next(iter(vectors.values())))
+            features.embeddings = np.zeros((len(ids), dim), dtype=np.float32)
+            features.has_embedding = np.zeros(len(ids), dtype=bool)
+            for row, key in enumerate(ids):
+                vector = vectors.get(key)
+                if vector is not None:
+                    features.embeddings[row] = vector
+                    features.has_embedding[row] = True
+        return features
+
+
+class FastMatchScorer:
+    """
+    Scores every candidate against a job in one NumPy pass, without the LLM.
+    Components, each 0-1:
+    - required_skills / preferred_skills: share of the job's skills the candidate has
+    - experience: 1 inside [experience_min, experience_max], proportionally less when
+      short, gently less when over-qualified; 0.5 when the candidate's experience is unknown
+    - location: 1 if the job location appears in the candidate's current or preferred
+      location (or the job is remote), 0.5 if the candidate's location is unknown, else 0
+    - similarity: cosine similarity of profile and posting embeddings, clipped to 0-1
+    The score is their weighted mean (FAST_SCORE_WEIGHTS) on a 0-100 scale.
+    """
+
+    def __init__(self, matcher: Optional[SkillMatcher] = None):
+        self.matcher = matcher or get_skill_matcher()
+
+    def _skill_share(self, skills: List[str], features: CandidateFeatures) -> Optional[np.ndarray]:
+        if not skills:
+            return None
+        counts = np.zeros(len(features), dtype=np.float32)
+        for skill in skills:
+            rows = features.skill_postings.get(skill.lower())
+            if rows is not None:
+                counts[rows] += 1
+        return counts / len(skills)
+
+    @staticmethod
+    def _experience_fit(job: JobRequirements, features: CandidateFeatures) -> Optional[np.ndarray]:
+        if job.experience_min is None and job.experience_max is None:
+            return None
+        years = features.experience
+        fit = np.ones(len(features), dtype=np.float32)
+        if job.experience_min:
+            fit = np.where(years < job.experience_min, np.clip(years / job.experience_min, 0.0, 1.0), fit)
+        if job.experience_max is not None:
+            over = np.clip(1.0 - (years - job.experience_max) * OVERQUALIFIED_PENALTY_PER_YEAR, OVERQUALIFIED_FLOOR, 1.0)
+            fit = np.where(years > job.experience_max, over, fit)
+        return np.where(np.isnan(years), 0.5, fit).astype(np.float32)
+
+    @staticmethod
+    def _location_fit(job: JobRequirements, features: CandidateFeatures) -> Optional[np.ndarray]:
+        wanted = _location_key(job.location)
+        if not wanted:
+            return None
+        per_location = np.empty(len(features.locations), dtype=np.float32)
+        for code, key in enumerate(features.locations):
+            if "remote" in wanted:
+                per_location[code] = 1.0
+            elif key == "|":
+                per_location[code] = 0.5
+            else:
+                per_location[code] = 1.0 if any(
+                    part and (wanted in part or part in wanted) for part in key.split("|")
+                ) else 0.0
+        return per_location[features.location_codes]
+
+    @staticmethod
+    def _similarity(features: CandidateFeatures, job_vector: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if job_vector is None or features.embeddings is None:
+            return None
+        similarity = np.clip(features.embeddings @ job_vector, 0.0, 1.0)
+        return np.where(features.has_embedding, similarity, np.nan).astype(np.float32)
+
+    def components(
+        self,
+        job: JobRequirements,
+        features: CandidateFeatures,
+        job_vector: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """(n, len(COMPONENTS)) matrix of component values; NaN where a component does not apply."""
+        matrix = np.full((len(features), len(COMPONENTS)), np.nan, dtype=np.float32)
+        columns = {
+            "required_skills": self._skill_share(job.required_skills, features),
+            "preferred_skills": self._skill_share(job.preferred_skills, features),
+            "experience": self._experience_fit(job, features),
+            "location": self._location_fit(job, features),
+            "similarity": self._similarity(features, job_vector),
+        }
+        for i, name in enumerate(COMPONENTS):
+            if columns[name] is not None:
+                matrix[:, i] = columns[name]
+        return matrix
+
+    @staticmethod
+    def combine(components: np.ndarray) -> np.ndarray:
+        """Weighted mean of the applicable components per row, 0-100."""
+        weights = np.array([FAST_SCORE_WEIGHTS[name] for name in COMPONENTS], dtype=np.float32)
+        present = ~np.isnan(components)
+        total = (present * weights).sum(axis=1)
+        weighted = (np.nan_to_num(components) * weights).sum(axis=1)
+        return np.round(100.0 * np.divide(weighted, total, out=np.zeros_like(total), where=total > 0), 2)
+
+    def score(
+        self,
+        job: JobRequirements,
+        features: CandidateFeatures,
+        job_vector: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        return self.combine(self.components(job, features, job_vector))
+
+    def explain(self, job: JobRequirements, features: CandidateFeatures, row: int, components: np.ndarray) -> str:
+        """Short human-readable breakdown of one candidate's fast score."""
+        have = {skill.lower() for skill in features.skills[row]}
+        parts = []
+        for label, skills in (("Required skills", job.required_skills), ("Preferred skills", job.preferred_skills)):
+            if not skills:
+                continue
+            missing = [skill for skill in skills if skill.lower() not in have]
+            part = f"{label} {len(skills) - len(missing)}/{len(skills)}"
+            if missing:
+                part += f" (missing: {', '.join(missing[:5])}{'...' if len(missing) > 5 else ''})"
+            parts.append(part)
+        values = dict(zip(COMPONENTS, components[row]))
+        if not np.isnan(values["experience"]):
+            years = features.experience[row]
+            wanted = f"{job.experience_min or 0:g}-{job.experience_max:g}" if job.experience_max is not None else f"{job.experience_min:g}+"
+            parts.append(f"Experience {'unknown' if np.isnan(years) else f'{years:g} yrs'} (wanted {wanted})")
+        if not np.isnan(values["location"]):
+            parts.append(f"Location {'match' if values['location'] == 1.0 else 'unknown' if values['location'] == 0.5 else 'mismatch'}")
+        if not np.isnan(values["similarity"]):
+            parts.append(f"Profile similarity {values['similarity']:.2f}")
+        return "Fast match: " + ("; ".join(parts) if parts else "no comparable profile data") + "."
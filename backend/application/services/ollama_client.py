@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Any, Optional
+import httpx
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Pooled keep-alive HTTP client shared by every Ollama call in this process.
+    Connections are bound to an event loop, so a new client is created if the loop changes.
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_HTTP_MAX_CONNECTIONS
+            )
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+class JsonObjectScanner:
+    """
+    Incrementally tracks brace depth (ignoring braces inside strings) so a
+    streamed generation can be cut off the moment its top-level JSON object closes.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, piece: str) -> bool:
+        """Appends a streamed piece; returns True once the object is complete."""
+        for i, char in enumerate(piece):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = self._started
+            elif char == "{":
+                self._depth += 1
+                self._started = True
+            elif char == "}" and self._started:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.text += piece[:i + 1]
+                    self.complete = True
+                    return True
+        self.text += piece
+        return False
+
+
+@dataclass
+class GenerationStats:
+    """Prompt timings of one generation, filled in by OllamaClient when a stats object is passed."""
+    prompt_eval_count: Optional[int] = None
+    prompt_eval_seconds: Optional[float] = None  # As reported by Ollama in the final chunk
+    first_token_seconds: Optional[float] = None  # Measured client-side for streamed generations
+
+    @property
+    def prompt_seconds(self) -> Optional[float]:
+        # Streams cut short never see the final chunk; time to first token is then the best proxy
+        return self.prompt_eval_seconds if self.prompt_eval_seconds is not None else self.first_token_seconds
+
+    def update_from_final_chunk(self, chunk: Dict[str, Any]) -> None:
+        if "prompt_eval_count" in chunk:
+            self.prompt_eval_count = chunk["prompt_eval_count"]
+        if "prompt_eval_duration" in chunk:
+            self.prompt_eval_seconds = chunk["prompt_eval_duration"] / 1e9
+
+
+class OllamaClient:
+    """
+    Minimal async client for the Ollama REST API.
+    Talks to /api/generate directly so generations never block the event loop.
+    """
+
+    def __init__(self, base_url: str, model: str, options: Optional[Dict[str, Any]] = None, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.options = options or {}
+        self.timeout = timeout
+
+    def _payload(self, prompt: str, stream: bool, keep_alive: Optional[str], options: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {**self.options, **options}
+        }
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    async def generate(
+        self,
+        prompt: str,
+        keep_alive: Optional[str] = None,
+        stats: Optional[GenerationStats] = None,
+        **options
+    ) -> str:
+        """Runs a single non-streaming generation and returns the response text."""
+        payload = self._payload(prompt, False, keep_alive, options)
+        response = await get_http_client().post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if stats is not None:
+            stats.update_from_final_chunk(data)
+        return data.get("response", "")
+
+    async def generate_json(
+        self,
+        prompt: str,
+        keep_alive: Optional[str] = None,
+        stats: Optional[GenerationStats] = None,
+        **options
+    ) -> str:
+        """
+        Streams a generation in Ollama's JSON mode and stops reading as soon as the
+        top-level object is closed. Closing the stream makes Ollama abort the
+        request, so no tokens are spent on trailing filler.
+        """
+        payload = self._payload(prompt, True, keep_alive, options)
+        payload["format"] = "json"
+        scanner = JsonObjectScanner()
+        started = time.monotonic()
+        client = get_http_client()
+        async with client.stream("POST", f"{self.base_url}/api/generate", json=payload, timeout=self.timeout) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if stats is not None:
+                    if stats.first_token_seconds is None and chunk.get("response"):
+                        stats.first_token_seconds = time.monotonic() - started
+                    if chunk.get("done"):
+                        stats.update_from_final_chunk(chunk)
+                if scanner.feed(chunk.get("response", "")) or chunk.get("done"):
+                    break
+        return scanner.text
+
+    async def generate_stream(self, prompt: str, keep_alive: Optional[str] = None, **options) -> AsyncIterator[str]:
+        """
+        Streams a generation, yielding response text as Ollama produces it.
+        Closing the generator early closes the connection, which makes Ollama abort the request.
+        """
+        payload = self._payload(prompt, True, keep_alive, options)
+        client = get_http_client()
+        async with client.stream("POST", f"{self.base_url}/api/generate", json=payload, timeout=self.timeout) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    async def load(self, keep_alive: str) -> None:
+        """Loads the model (if needed) and sets how long Ollama keeps it in memory after the last request."""
+        payload = {"model": self.model, "keep_alive": keep_alive}
+        response = await get_http_client().post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout)
+        response.raise_for_status()
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+from core.config import settings
+from application.services.ollama_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+
+class AIUnavailableError(Exception):
+    """Raised without contacting Ollama while its circuit breaker is open."""
+
+
+class OllamaHealth:
+    """
+    Health of one Ollama host.
+
+    Availability is re-probed (GET /api/tags) once the last result is older than
+    AI_HEALTH_CHECK_TTL_SECONDS, so an outage or a recovery is noticed without a restart.
+    A circuit breaker opens after AI_CIRCUIT_FAILURE_THRESHOLD consecutive failed calls
+    (or a failed probe); while open, calls fail fast with AIUnavailableError instead of
+    waiting for a timeout. After AI_CIRCUIT_RESET_SECONDS the next call probes the host
+    (half-open) and closes the breaker again if it answers.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.ttl_seconds = settings.AI_HEALTH_CHECK_TTL_SECONDS
+        self.probe_timeout = settings.AI_HEALTH_PROBE_TIMEOUT_SECONDS
+        self.failure_threshold = max(1, settings.AI_CIRCUIT_FAILURE_THRESHOLD)
+        self.reset_seconds = settings.AI_CIRCUIT_RESET_SECONDS
+        self.is_open = False
+        self.failures = 0
+        self.opened_at = 0.0
+        self.checked_at: Optional[float] = None
+        self.healthy = False
+        self._probe_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def state(self) -> str:
+        if not self.is_open:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.reset_seconds else "half-open"
+
+    async def is_available(self) -> bool:
+        """Cached availability, re-probed after the TTL (or the breaker's reset time)."""
+        state = self.state
+        if state == "open":
+            return False
+        if state == "half-open" or self.checked_at is None or time.monotonic() - self.checked_at >= self.ttl_seconds:
+            return await self._probe()
+        return self.healthy
+
+    async def ensure_available(self) -> None:
+        """Fails fast while the breaker is open; probes once when it is half-open."""
+        state = self.state
+        if state == "open" or (state == "half-open" and not await self._probe()):
+            raise AIUnavailableError(f"AI service at {self.base_url} is unavailable")
+
+    async def _probe(self) -> bool:
+        if self._probe_lock is None:
+            self._probe_lock = asyncio.Lock()
+        started = time.monotonic()
+        async with self._probe_lock:
+            # Another caller probed while we waited for the lock
+            if self.checked_at is not None and self.checked_at >= started:
+                return self.healthy
+            try:
+                response = await get_http_client().get(f"{self.base_url}/api/tags", timeout=self.probe_timeout)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            self.checked_at = time.monotonic()
+            if ok:
+                self.record_success()
+            else:
+                self._open()
+            return ok
+
+    def record_success(self) -> None:
+        if self.is_open:
+            logger.info(f"AI Service (Ollama) at {self.base_url} is available again")
+        self.is_open = False
+        self.failures = 0
+        self.healthy = True
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        if not self.is_open:
+            logger.warning(f"AI Service (Ollama) at {self.base_url} is not available. AI features will be limited.")
+        self.is_open = True
+        self.opened_at = time.monotonic()
+        self.healthy = False
+
+
+_health: Dict[str, OllamaHealth] = {}
+
+
+def get_ollama_health(base_url: str) -> OllamaHealth:
+    """Process-wide health state per host, shared by every AIService instance."""
+    key = base_url.rstrip("/")
+    if key not in _health:
+        _health[key] = OllamaHealth(key)
+    return _health[key]
@@ -0,0 +1,34 @@
+"""
+PDF text extraction that runs inside a worker process.
+Kept free of application imports so spawned workers start quickly.
+"""
+import time
+from typing import Tuple
+
+import pdfplumber
+
+
+def extract_pdf_text(file_path: str, max_pages: int, max_chars: int, time_budget_seconds: float) -> Tuple[str, bool]:
+    """
+    Extracts text page by page, stopping early once max_pages pages were read,
+    max_chars characters were collected or the time budget ran out.
+    Returns (text, complete); complete is False when the time budget cut the
+    extraction short, so callers can avoid caching the truncated text.
+    """
+    deadline = time.monotonic() + time_budget_seconds
+    parts = []
+    collected = 0
+    complete = True
+    with pdfplumber.open(file_path) as pdf:
+        pages = pdf.pages[:max_pages]
+        for index, page in enumerate(pages):
+            extracted = page.extract_text()
+            if extracted:
+                parts.append(extracted + "\n")
+                collected += len(extracted) + 1
+            if collected >= max_chars:
+                break
+            if time.monotonic() >= deadline:
+                complete = index == len(pages) - 1
+                break
+    return "".join(parts)[:max_chars], complete
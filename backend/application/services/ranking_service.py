@@ -0,0 +1,338 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from infrastructure.database.models import Application
+from application.services.ai_service import AIService, RankingRun
+from application.services.embedding_service import EmbeddingService
+from application.services.llm_scheduler import Priority, llm_priority
+from application.services.match_scorer import FAST_SCORER_VERSION, CandidateFeatures, FastMatchScorer, JobRequirements
+from application.services.resume_parsing_service import apply_parsed_resume, is_partial_parse, resume_mime_type
+from application.services.skill_matcher import get_skill_matcher
+
+logger = logging.getLogger(__name__)
+
+
+def apply_rank_result(
+    ai_service: AIService,
+    application: Application,
+    job_description: str,
+    profile: Dict[str, Any],
+    result: Dict[str, Any]
+) -> bool:
+    """
+    Stores a rank result on the application together with the fingerprints of the
+    inputs it was computed from. Returns False for a failed ranking, whose inputs are
+    left unrecorded so the next ranking run retries it.
+    """
+    application.ai_match_score = result.get("score", 0)
+    application.ai_match_reasoning = result.get("reasoning", "No explanation provided")
+    if result.get("failed"):
+        application.ai_jd_fingerprint = None
+        return False
+    for field, value in ai_service.ranking_fingerprints(job_description, profile).items():
+        setattr(application, field, value)
+    application.ai_ranked_at = datetime.utcnow()
+    return True
+
+
+@dataclass
+class _RankingItem:
+    """Plain snapshot of what a worker needs, so workers never touch the ORM session."""
+    application: Application
+    job_description: Optional[str]
+    resume_url: Optional[str]
+    profile: Optional[Dict[str, Any]]
+
+
+class RankingEngine:
+    """
+    Ranks many applications concurrently.
+    One worker per bulk LLM slot in the backend pool pulls from a shared queue, so adding
+    an Ollama host adds workers; results are applied as they complete and committed in batches.
+    Workers take up to AI_RANKING_PROMPT_BATCH_SIZE applications at a time and score
+    those sharing a job description in one batched prompt. The model is kept loaded
+    for the whole run so the shared JD prompt prefix stays in Ollama's KV cache.
+    All of its LLM calls run at bulk priority, behind interactive requests.
+    Runs are incremental: each score is stored with fingerprints of its inputs
+    (JD, profile, model/prompt version), and applications whose inputs are unchanged
+    keep their score without an LLM call.
+    """
+
+    def __init__(self, ai_service: Optional[AIService] = None, embedding_service: Optional[EmbeddingService] = None):
+        self.ai_service = ai_service or AIService()
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.batch_size = max(1, settings.AI_RANKING_COMMIT_BATCH_SIZE)
+        self.prompt_batch_size = max(1, settings.AI_RANKING_PROMPT_BATCH_SIZE)
+
+    @property
+    def concurrency(self) -> int:
+        if settings.AI_RANKING_CONCURRENCY > 0:
+            return settings.AI_RANKING_CONCURRENCY
+        # More workers than bulk slots would only queue behind the scheduler
+        return self.ai_service.pool.bulk_capacity
+
+    async def rank_applications(
+        self,
+        db: Session,
+        applications: List[Application],
+        parse_missing: bool = True,
+        allow_empty_profile: bool = False,
+        force: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Scores the given applications against their job posting description.
+        If parse_missing is set, unparsed resumes are parsed first and saved on the candidate.
+        If allow_empty_profile is set, candidates without parsed data are ranked with an empty profile.
+        Applications already scored from the same inputs are left as they are unless force is set.
+        Returns counts of ranked, unchanged, skipped and errored applications, plus the
+        estimated prompt-eval seconds saved by reusing the JD prefix.
+        """
+        with llm_priority(Priority.BULK):
+            return await self._rank_applications(db, applications, parse_missing, allow_empty_profile, force)
+
+    async def _rank_applications(
+        self,
+        db: Session,
+        applications: List[Application],
+        parse_missing: bool,
+        allow_empty_profile: bool,
+        force: bool
+    ) -> Dict[str, Any]:
+        stats = {"ranked": 0, "unchanged": 0, "skipped": 0, "errors": 0, "prompt_eval_seconds_saved": 0.0}
+
+        items = []
+        for application in applications:
+            item = self._item(application)
+            if not force and self._is_unchanged(item, parse_missing, allow_empty_profile):
+                stats["unchanged"] += 1
+            else:
+                items.append(item)
+
+        if not items:
+            logger.info(f"Ranking run skipped: all {stats['unchanged']} applications are up to date")
+            return stats
+
+        run = RankingRun()
+        await self.ai_service.keep_model_loaded(run.keep_alive)
+
+        work_queue: asyncio.Queue = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            work_queue.put_nowait(item)
+
+        worker_count = min(self.concurrency, len(items))
+        # Spread small runs over every worker rather than filling one prompt
+        prompt_batch_size = min(self.prompt_batch_size, -(-len(items) // worker_count))
+        workers = [
+            asyncio.create_task(self._worker(
+                work_queue, results, run, prompt_batch_size, parse_missing, allow_empty_profile
+            ))
+            for _ in range(worker_count)
+        ]
+
+        try:
+            pending_writes = 0
+            for _ in range(len(items)):
+                item, parsed_data, profile, result, error = await results.get()
+                application = item.application
+
+                if parsed_data and application.candidate:
+                    # Same coercion and merge rules as every other parse path, but only the
+                    # profile: a parsed email may belong to another candidate (unique column)
+                    apply_parsed_resume(application.candidate, parsed_data, profile_only=True)
+
+                if error:
+                    logger.error(f"Error ranking application {application.id}: {error}")
+                    stats["errors"] += 1
+                elif result is None:
+                    stats["skipped"] += 1
+                elif apply_rank_result(self.ai_service, application, item.job_description, profile, result):
+                    stats["ranked"] += 1
+                else:
+                    stats["errors"] += 1
+
+                pending_writes += 1
+                if pending_writes >= self.batch_size:
+                    db.commit()
+                    pending_writes = 0
+
+            db.commit()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            # Let Ollama unload the model on its usual schedule again
+            await self.ai_service.keep_model_loaded(settings.AI_DEFAULT_KEEP_ALIVE)
+
+        stats["prompt_eval_seconds_saved"] = round(run.saved_seconds, 2)
+        logger.info(
+            f"Ranking run finished with {worker_count} workers for {len(items)} changed applications: {stats} "
+            f"({run.calls} LLM calls, {run.prompt_eval_seconds:.1f}s prompt eval)"
+        )
+        return stats
+
+    async def rank_applications_fast(
+        self,
+        db: Session,
+        applications: List[Application],
+        keep_llm_scores: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Scores applications with FastMatchScorer instead of the LLM: deterministic, needs
+        no Ollama, and takes milliseconds for thousands of applications. Candidate features
+        are built once and each job posting is scored against all of them in one pass.
+        Scores are stored with ai_model_version = FAST_SCORER_VERSION, so a later LLM run
+        re-scores them. With keep_llm_scores (fallback while the AI is down), applications
+        whose LLM score is still current are left as they are and counted as unchanged.
+        Returns the same counts as rank_applications.
+        """
+        stats = {"ranked": 0, "unchanged": 0, "skipped": 0, "errors": 0, "prompt_eval_seconds_saved": 0.0}
+        by_posting: Dict[Any, List[Application]] = {}
+        for application in applications:
+            if application.job_posting is None or application.candidate is None:
+                stats["skipped"] += 1
+                continue
+            if keep_llm_scores and self._is_unchanged(self._item(application), False, True):
+                stats["unchanged"] += 1
+                continue
+            by_posting.setdefault(application.job_posting_id, []).append(application)
+        if not by_posting:
+            return stats
+
+        matcher = await asyncio.to_thread(get_skill_matcher)
+        scorer = FastMatchScorer(matcher)
+        candidates = list({
+            str(application.candidate.id): application.candidate
+            for group in by_posting.values() for application in group
+        }.values())
+        try:
+            vectors = await asyncio.to_thread(
+                self.embedding_service.stored_candidate_vectors, [candidate.id for candidate in candidates]
+            )
+        except Exception as e:
+            logger.warning(f"Embedding index unavailable, fast ranking without similarity: {e}")
+            vectors = {}
+        features = CandidateFeatures.build(candidates, matcher, vectors)
+
+        for group in by_posting.values():
+            job_posting = group[0].job_posting
+            job = JobRequirements.from_posting(job_posting, matcher)
+            job_vector = None
+            if vectors:
+                embedded = await self.embedding_service.embed([EmbeddingService.job_posting_text(job_posting)])
+                job_vector = embedded[0] if embedded is not None else None
+            components = scorer.components(job, features, job_vector)
+            scores = scorer.combine(components)
+            for application in group:
+                row = features.index[str(application.candidate.id)]
+                application.ai_match_score = float(scores[row])
+                application.ai_match_reasoning = scorer.explain(job, features, row, components)
+                application.ai_jd_fingerprint = None
+                application.ai_profile_fingerprint = None
+                application.ai_model_version = FAST_SCORER_VERSION
+                application.ai_ranked_at = datetime.utcnow()
+                stats["ranked"] += 1
+
+        db.commit()
+        logger.info(f"Fast ranking of {len(features)} candidates over {len(by_posting)} postings: {stats}")
+        return stats
+
+    async def _worker(
+        self,
+        work_queue: asyncio.Queue,
+        results: asyncio.Queue,
+        run: RankingRun,
+        prompt_batch_size: int,
+        parse_missing: bool,
+        allow_empty_profile: bool
+    ) -> None:
+        while True:
+            batch = []
+            while len(batch) < prompt_batch_size:
+                try:
+                    batch.append(work_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            if not batch:
+                return
+
+            prepared = await asyncio.gather(
+                *(self._prepare(item, parse_missing, allow_empty_profile) for item in batch),
+                return_exceptions=True
+            )
+
+            # Group by job description so each group is one batched prompt
+            groups: Dict[str, List] = {}
+            for item, outcome in zip(batch, prepared):
+                if isinstance(outcome, Exception):
+                    results.put_nowait((item, None, None, None, outcome))
+                    continue
+                parsed_data, profile = outcome
+                if profile is None:
+                    results.put_nowait((item, parsed_data, None, None, None))
+                    continue
+                groups.setdefault(item.job_description, []).append((item, parsed_data, profile))
+
+            for job_description, entries in groups.items():
+                try:
+                    if len(entries) == 1:
+                        scores = [await self.ai_service.rank_candidate(job_description, entries[0][2], run=run)]
+                    else:
+                        scores = await self.ai_service.rank_candidates_batch(
+                            job_description, [profile for _, _, profile in entries], run=run
+                        )
+                    for (item, parsed_data, profile), result in zip(entries, scores):
+                        results.put_nowait((item, parsed_data, profile, result, None))
+                except Exception as e:
+                    for item, parsed_data, profile in entries:
+                        results.put_nowait((item, parsed_data, profile, None, e))
+
+    @staticmethod
+    def _item(application: Application) -> "_RankingItem":
+        candidate = application.candidate
+        return _RankingItem(
+            application=application,
+            job_description=application.job_posting.description if application.job_posting else None,
+            resume_url=candidate.resume_url if candidate else None,
+            profile=candidate.resume_parsed_data if candidate else None
+        )
+
+    def _is_unchanged(self, item: _RankingItem, parse_missing: bool, allow_empty_profile: bool) -> bool:
+        """True if the stored score was computed from exactly the inputs this run would use."""
+        application = item.application
+        if application.ai_match_score is None or not application.ai_jd_fingerprint or not item.job_description:
+            return False
+        profile = item.profile
+        if not profile or is_partial_parse(profile):
+            # A resume that would be parsed first has no known profile yet
+            if not allow_empty_profile or (parse_missing and item.resume_url):
+                return False
+            profile = {}
+        fingerprints = self.ai_service.ranking_fingerprints(item.job_description, profile)
+        return all(getattr(application, field) == value for field, value in fingerprints.items())
+
+    async def _prepare(self, item: _RankingItem, parse_missing: bool, allow_empty_profile: bool):
+        """Returns (newly parsed data or None, profile to rank or None to skip)."""
+        if not item.job_description:
+            return None, None
+
+        parsed_data = None
+        profile = item.profile
+        if profile and is_partial_parse(profile):
+            # Only rule-based contact details so far; nothing to rank on
+            profile = None
+        if not profile and parse_missing and item.resume_url:
+            parsed = await self.ai_service.parse_resume(item.resume_url, resume_mime_type(item.resume_url))
+            if "error" not in parsed and not is_partial_parse(parsed):
+                parsed_data = profile = parsed
+
+        if not profile:
+            if not allow_empty_profile:
+                return parsed_data, None
+            profile = {}
+
+        return parsed_data, profile
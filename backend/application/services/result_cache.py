@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Small persistent key/value cache for LLM results, backed by SQLite.
+    Entries expire after ttl_seconds; once max_entries is exceeded the least
+    recently used entries are dropped. WAL mode lets several worker processes share the file.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.path = path or settings.AI_RESULT_CACHE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.AI_RESULT_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.AI_RESULT_CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_results_accessed_at ON results (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT value, created_at FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                value, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+                self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            return json.loads(value)
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now)
+                )
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+                if count > self.max_entries:
+                    self._conn.execute(
+                        "DELETE FROM results WHERE key IN ("
+                        " SELECT key FROM results ORDER BY accessed_at ASC LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache write failed: {e}")
@@ -0,0 +1,226 @@
+"""
+Rule-based extraction of the resume fields that need no reasoning:
+contact details, profile links and section headers.
+Runs in microseconds and works without the LLM.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# Optional country code, then 10-15 digits with common separators
+PHONE_RE = re.compile(r"(?<![\w/])(\+?\d{1,3}[\s.-]?)?(\(?\d{2,5}\)?[\s.-]?){2,4}\d{2,5}(?![\w/])")
+URL_RE = re.compile(r"(?:https?://|www\.)[^\s<>()\"',;]+|(?:linkedin\.com|github\.com)/[^\s<>()\"',;]+", re.IGNORECASE)
+
+# Canonical section name -> header spellings seen in resumes
+SECTION_HEADERS: Dict[str, Tuple[str, ...]] = {
+    "summary": ("summary", "profile", "professional summary", "objective", "career objective", "about me"),
+    "experience": ("experience", "work experience", "professional experience", "employment history", "work history"),
+    "education": ("education", "academic background", "academic qualifications", "qualifications"),
+    "skills": ("skills", "technical skills", "key skills", "core competencies", "technologies"),
+    "projects": ("projects", "key projects", "personal projects"),
+    "certifications": ("certifications", "certificates", "licenses & certifications", "licenses and certifications"),
+    "awards": ("awards", "achievements", "honors", "honours"),
+    "languages": ("languages",),
+}
+_HEADER_LOOKUP = {alias: name for name, aliases in SECTION_HEADERS.items() for alias in aliases}
+_HEADER_WORDS = {word for alias in _HEADER_LOOKUP for word in alias.split()} | {"resume", "curriculum", "vitae", "cv"}
+# Capitalised words near the top of a resume that belong to titles or labels, not names
+_NOT_NAME_WORDS = {
+    "senior", "junior", "lead", "principal", "staff", "chief", "head", "associate", "assistant",
+    "developer", "engineer", "manager", "analyst", "consultant", "designer", "architect", "administrator",
+    "intern", "trainee", "executive", "specialist", "officer", "director", "scientist", "programmer",
+    "tester", "recruiter", "accountant", "software", "data", "full", "stack", "contact", "information",
+    "details", "personal", "address", "email", "phone", "mobile",
+}
+
+
+def _section_for_line(line: str) -> Optional[str]:
+    cleaned = re.sub(r"[^a-z& ]", "", line.lower()).strip()
+    return _HEADER_LOOKUP.get(cleaned) if len(cleaned) <= 40 else None
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Splits resume text at recognised section headers.
+    Returns (section name, body) pairs in document order; text before the
+    first header is returned as "header" (usually name and contact details).
+    """
+    sections: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in text.splitlines():
+        name = _section_for_line(line)
+        if name:
+            sections.append((name, []))
+        else:
+            sections[-1][1].append(line)
+    return [(name, "\n".join(lines).strip()) for name, lines in sections if name != "header" or any(l.strip() for l in lines)]
+
+
+def _find_phone(text: str) -> Optional[str]:
+    for match in PHONE_RE.finditer(text):
+        candidate = match.group(0).strip()
+        digits = re.sub(r"\D", "", candidate)
+        # Skip years, date ranges and other short numbers
+        if 10 <= len(digits) <= 15:
+            return candidate[:20]
+    return None
+
+
+def _find_links(text: str) -> Dict[str, str]:
+    links: Dict[str, str] = {}
+    for match in URL_RE.finditer(text):
+        url = match.group(0).rstrip(".")
+        if not url.lower().startswith("http"):
+            url = f"https://{url}"
+        lowered = url.lower()
+        if "linkedin.com/" in lowered:
+            links.setdefault("linkedin_url", url)
+        elif "github.com/" in lowered:
+            links.setdefault("github_url", url)
+        else:
+            links.setdefault("portfolio_url", url)
+    return links
+
+
+def _find_name(text: str) -> Tuple[Optional[str], Optional[str]]:
+    # The name is almost always one of the first few non-empty lines.
+    # Lines with commas are usually locations ("Bengaluru, India")
+    lines = [line.strip() for line in text.splitlines() if line.strip()][:5]
+    for line in lines:
+        if "@" in line or "," in line or any(char.isdigit() for char in line):
+            continue
+        words = line.split()
+        if not 2 <= len(words) <= 4:
+            continue
+        if not all(re.fullmatch(r"[A-Za-z][A-Za-z'.-]*", word) for word in words):
+            continue
+        if any(word.lower() in _HEADER_WORDS or word.lower() in _NOT_NAME_WORDS for word in words):
+            continue
+        if not all(word[0].isupper() for word in words):
+            continue
+        first_name, last_name = words[0], " ".join(words[1:])
+        if line.isupper():
+            first_name, last_name = first_name.title(), last_name.title()
+        return first_name, last_name
+    return None, None
+
+
+def name_matches_email(first_name: Optional[str], last_name: Optional[str], email: Optional[str]) -> bool:
+    """True when part of the name appears in the email's local part, e.g. rahul.kumar@..."""
+    if not email or not first_name:
+        return False
+    local = re.sub(r"[^a-z]", "", email.split("@")[0].lower())
+    parts = [re.sub(r"[^a-z]", "", part.lower()) for part in f"{first_name} {last_name or ''}".split()]
+    return any(len(part) >= 3 and part in local for part in parts)
+
+
+def extract_contact_details(text: str) -> Dict[str, Any]:
+    """
+    Finds name, email, phone, profile links and the sections present in a resume.
+    Only fields that were found are included. The name is a guess from the first
+    lines; prefer the LLM's reading where one is available.
+    """
+    details: Dict[str, Any] = {}
+    first_name, last_name = _find_name(text)
+    if first_name:
+        details["first_name"] = first_name
+        details["last_name"] = last_name
+    email = EMAIL_RE.search(text)
+    if email:
+        details["email"] = email.group(0).lower()
+    phone = _find_phone(text)
+    if phone:
+        details["phone"] = phone
+    details.update(_find_links(text))
+    sections = [name for name, _ in split_sections(text) if name != "header"]
+    if sections:
+        details["sections"] = list(dict.fromkeys(sections))
+    return details
+
+
+# Sections in order of value for structured extraction; unlisted ones come last
+SECTION_PRIORITY = ("skills", "experience", "education", "summary", "certifications", "projects", "header", "languages", "awards")
+# Every present section first gets up to this many characters before any section grows further
+MIN_SECTION_SHARE = 400
+
+_BOILERPLATE_RE = re.compile(
+    r"^(page \d+( of \d+)?|\d+\s*/\s*\d+|curriculum vitae|resume|r[ée]sum[ée]|cv|"
+    r"references( are)? available (up)?on request\.?|[\W_]+)$",
+    re.IGNORECASE
+)
+
+
+def clean_resume_text(text: str) -> str:
+    """
+    Collapses repeated whitespace and drops boilerplate: page numbers, "Curriculum Vitae"
+    titles, decorative rules, consecutive duplicate lines and page headers/footers
+    that PDF extraction repeats on every page.
+    """
+    lines = [re.sub(r"[ \t\u00a0]+", " ", line).strip() for line in text.splitlines()]
+    counts: Dict[str, int] = {}
+    for line in lines:
+        if line:
+            counts[line] = counts.get(line, 0) + 1
+
+    cleaned: List[str] = []
+    for line in lines:
+        if not line:
+            if cleaned and cleaned[-1]:
+                cleaned.append("")
+            continue
+        if _BOILERPLATE_RE.match(line):
+            continue
+        # Short lines seen on three or more pages are running headers/footers;
+        # repeated labels such as "Responsibilities:" are kept
+        if counts[line] >= 3 and len(line) < 80 and not line.endswith(":") and not _section_for_line(line):
+            continue
+        if cleaned and cleaned[-1] == line:
+            continue
+        cleaned.append(line)
+    return "\n".join(cleaned).strip()
+
+
+def _cut_at_line(body: str, max_chars: int) -> str:
+    if len(body) <= max_chars:
+        return body
+    cut = body.rfind("\n", 0, max_chars)
+    return body[:cut if cut > max_chars // 2 else max_chars].rstrip()
+
+
+def pack_resume_text(text: str, max_chars: int) -> str:
+    """
+    Cleans the resume and packs its most useful sections into max_chars.
+    Each section first receives a minimum share in SECTION_PRIORITY order, then the
+    remaining budget extends sections in the same order. Sections are cut at line
+    boundaries and emitted in document order with their headers.
+    """
+    sections = split_sections(clean_resume_text(text))
+    if not sections:
+        return ""
+
+    def rank(index: int) -> int:
+        name = sections[index][0]
+        return SECTION_PRIORITY.index(name) if name in SECTION_PRIORITY else len(SECTION_PRIORITY)
+
+    order = sorted(range(len(sections)), key=rank)
+    header_cost = [0 if name == "header" else len(name) + 3 for name, _ in sections]
+    allowance = [0] * len(sections)
+    remaining = max_chars
+
+    for limit in (MIN_SECTION_SHARE, None):
+        for i in order:
+            body = sections[i][1]
+            wanted = len(body) if limit is None else min(len(body), limit)
+            cost = header_cost[i] if allowance[i] == 0 else 0
+            extra = min(wanted - allowance[i], remaining - cost)
+            if extra <= 0:
+                continue
+            allowance[i] += extra
+            remaining -= extra + cost
+
+    parts = []
+    for i, (name, body) in enumerate(sections):
+        if allowance[i] <= 0 or not body:
+            continue
+        packed = _cut_at_line(body, allowance[i])
+        parts.append(packed if name == "header" else f"{name.upper()}:\n{packed}")
+    return "\n\n".join(parts)
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any
+
+from infrastructure.database.connection import SessionLocal
+from infrastructure.database.models import Candidate, ResumeParseJob
+from application.services.ai_service import AIService
+from application.services.embedding_service import EmbeddingService
+from application.services.llm_scheduler import Priority, llm_priority
+
+logger = logging.getLogger(__name__)
+
+ai_service = AIService()
+embedding_service = EmbeddingService()
+
+# Errors that will not go away by retrying
+PERMANENT_ERRORS = {"Could not extract text from file"}
+
+
+class RetryableParseError(Exception):
+    """Raised when a parse job failed for a transient reason (e.g. AI offline) and should be retried."""
+
+
+def resume_mime_type(resume_url: str) -> str:
+    # Determine mime type from extension
+    return "application/pdf" if resume_url.lower().endswith(".pdf") else "text/plain"
+
+
+def is_partial_parse(parsed_data: Dict[str, Any]) -> bool:
+    """True for rule-based fields only (the AI was offline), which lack experience and education."""
+    return parsed_data.get("ai_parsed") is False
+
+
+def apply_parsed_resume(candidate: Candidate, parsed_data: Dict[str, Any], profile_only: bool = False) -> None:
+    """
+    Copies parsed resume fields onto the candidate profile.
+    With profile_only, identity and contact fields (name, email, phone, links) are left
+    alone: bulk paths such as ranking must not risk a unique-email clash with another candidate.
+    """
+    # A partial parse must not replace an earlier full one
+    if not is_partial_parse(parsed_data) or not candidate.resume_parsed_data:
+        candidate.resume_parsed_data = parsed_data
+
+    if not profile_only:
+        # Only update basic fields if they are missing or if parsed data has them.
+        # A partial parse only has a heuristic guess at the name, which must not replace a real one
+        guessed_name = is_partial_parse(parsed_data) and bool(candidate.first_name)
+        if parsed_data.get("first_name") and not guessed_name:
+            candidate.first_name = parsed_data["first_name"]
+        if parsed_data.get("last_name") and not guessed_name:
+            candidate.last_name = parsed_data["last_name"]
+        if parsed_data.get("email"):
+            candidate.email = parsed_data["email"]
+        if parsed_data.get("phone"):
+            candidate.phone = parsed_data["phone"]
+        if parsed_data.get("linkedin_url"):
+            candidate.linkedin_url = parsed_data["linkedin_url"]
+        if parsed_data.get("portfolio_url"):
+            candidate.portfolio_url = parsed_data["portfolio_url"]
+
+    # Rule-based skills from a partial parse only fill an empty list
+    if parsed_data.get("skills") is not None and (not is_partial_parse(parsed_data) or not candidate.skills):
+        candidate.skills = parsed_data["skills"]
+
+    if parsed_data.get("highest_education"):
+        candidate.highest_education = parsed_data["highest_education"]
+    if parsed_data.get("current_company"):
+        candidate.current_company = parsed_data["current_company"]
+    if parsed_data.get("current_designation"):
+        candidate.current_designation = parsed_data["current_designation"]
+
+    # Convert experience to decimal if possible
+    exp = parsed_data.get("total_experience_years")
+    if exp is not None:
+        try:
+            candidate.total_experience_years = float(exp)
+        except (ValueError, TypeError):
+            pass
+
+
+async def run_parse_job(job_id: str, final_attempt: bool = True) -> None:
+    """
+    Executes one attempt of a resume parse job and records its progress.
+    Raises RetryableParseError for transient failures unless this is the final attempt,
+    in which case the job is marked failed instead.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(ResumeParseJob).filter(ResumeParseJob.id == job_id).first()
+        if not job:
+            logger.warning(f"Resume parse job {job_id} not found")
+            return
+
+        job.status = "running"
+        job.progress = 10
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = job.started_at or datetime.utcnow()
+        job.error = None
+        db.commit()
+
+        candidate = job.candidate
+        if not candidate or not candidate.resume_url:
+            _finish(db, job, "failed", error="No resume uploaded for this candidate")
+            return
+
+        try:
+            # Nobody is waiting on the response, so yield to interactive requests
+            with llm_priority(Priority.BULK):
+                parsed_data = await ai_service.parse_resume(candidate.resume_url, resume_mime_type(candidate.resume_url))
+        except Exception as e:
+            parsed_data = {"error": str(e)}
+
+        if not parsed_data or "error" in parsed_data:
+            error = (parsed_data or {}).get("error", "Unknown error")
+            if error not in PERMANENT_ERRORS and not final_attempt:
+                job.status = "queued"
+                job.progress = 0
+                job.error = error
+                db.commit()
+                raise RetryableParseError(error)
+            _finish(db, job, "failed", error=error)
+            return
+
+        job.progress = 80
+        try:
+            apply_parsed_resume(candidate, parsed_data)
+            db.commit()
+        except Exception as e:
+            # e.g. the parsed email already belongs to another candidate
+            db.rollback()
+            _finish(db, job, "failed", error=f"Could not save parsed data: {e}")
+            return
+
+        if is_partial_parse(parsed_data):
+            # Contact details are saved; experience and education still need the AI
+            error = "AI Service is offline. Only contact details were extracted."
+            if not final_attempt:
+                job.status = "queued"
+                job.progress = 0
+                job.error = error
+                db.commit()
+                raise RetryableParseError(error)
+            _finish(db, job, "succeeded", error=error)
+            return
+
+        await embedding_service.index_candidate(candidate)
+        _finish(db, job, "succeeded")
+    finally:
+        db.close()
+
+
+def _finish(db, job: ResumeParseJob, status: str, error: str = None) -> None:
+    job.status = status
+    job.progress = 100
+    job.error = error
+    job.finished_at = datetime.utcnow()
+    db.commit()
+    if status == "failed":
+        logger.error(f"Resume parse job {job.id} failed: {error}")
+    elif error:
+        logger.warning(f"Resume parse job {job.id} finished with a partial result: {error}")
+
+
+async def run_parse_job_in_process(job_id: str, max_retries: int) -> None:
+    """Fallback used when no Celery broker is reachable: same retries, run on the API's event loop."""
+    for attempt in range(max_retries + 1):
+        try:
+            await run_parse_job(job_id, final_attempt=attempt >= max_retries)
+            return
+        except RetryableParseError:
+            await asyncio.sleep(min(60, 2 ** attempt * 5))
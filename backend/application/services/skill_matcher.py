@@ -0,0 +1,203 @@
+"""
+Dictionary-based skill extraction. All skill aliases are compiled into one
+Aho-Corasick automaton, so a JD or resume is scanned for every known skill in
+a single pass over its text, without the LLM.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.lower())
+
+
+class SkillMatcher:
+    """
+    Finds skills from a vocabulary of canonical name -> aliases in free text.
+    Matching is case-insensitive, needs a word boundary on both sides (so "java"
+    does not match inside "javascript") and prefers the longest alias where
+    aliases overlap ("react native" over "react").
+    """
+
+    def __init__(self, vocabulary: Dict[str, Iterable[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (alias length, canonical name) for every alias ending there,
+        # including those reached through fail links
+        self._outputs: List[List[Tuple[int, str]]] = [[]]
+        self._canonical: Dict[str, str] = {}
+        self._names = {_normalize(name).strip(): name for name in vocabulary}
+
+        for canonical, aliases in vocabulary.items():
+            # A name without aliases is its own alias; otherwise the aliases are authoritative,
+            # so short or ambiguous names ("Go", "Excel") are not matched as plain words
+            for alias in aliases or (canonical,):
+                key = _normalize(alias).strip()
+                if key and key not in self._canonical:
+                    self._canonical[key] = canonical
+                    self._add(key, canonical)
+        self._build_fail_links()
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def _add(self, alias: str, canonical: str) -> None:
+        state = 0
+        for char in alias:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(alias), canonical))
+
+    def _build_fail_links(self) -> None:
+        queue: Deque[int] = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def _matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """(start, end, canonical) of every alias occurrence on word boundaries."""
+        found = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, canonical in self._outputs[state]:
+                start, end = i - length + 1, i + 1
+                # Boundaries only matter where the alias itself starts/ends with a word character,
+                # so ".net" and "c++" still match next to letters or punctuation
+                if text[start].isalnum() and start > 0 and text[start - 1].isalnum():
+                    continue
+                if text[i].isalnum() and end < len(text) and text[end].isalnum():
+                    continue
+                found.append((start, end, canonical))
+        return found
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills mentioned in the text, in order of first appearance."""
+        if not text:
+            return []
+        matches = sorted(self._matches(_normalize(text)), key=lambda match: (match[0], match[0] - match[1]))
+        skills: Dict[str, None] = {}
+        last_end = 0
+        for start, end, canonical in matches:
+            # Leftmost-longest, non-overlapping
+            if start < last_end:
+                continue
+            skills.setdefault(canonical, None)
+            last_end = end
+        return list(skills)
+
+    def normalize(self, skills: Iterable[str]) -> List[str]:
+        """
+        Maps free-form skill names (e.g. from the LLM) to canonical names.
+        Unknown skills are kept as given; duplicates are dropped.
+        """
+        result: Dict[str, None] = {}
+        seen: Set[str] = set()
+        for skill in skills:
+            if not isinstance(skill, str) or not skill.strip():
+                continue
+            key = _normalize(skill).strip()
+            if key in self._canonical or key in self._names:
+                names = [self._canonical.get(key) or self._names[key]]
+            else:
+                names = self.extract(skill) or [skill.strip()]
+            for name in names:
+                if name.lower() not in seen:
+                    seen.add(name.lower())
+                    result[name] = None
+        return list(result)
+
+    def overlap(self, required: Iterable[str], have: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Splits the required skills into (matched, missing) against a candidate's skills."""
+        have_keys = {name.lower() for name in self.normalize(have)}
+        matched, missing = [], []
+        for skill in self.normalize(required):
+            (matched if skill.lower() in have_keys else missing).append(skill)
+        return matched, missing
+
+    def score(self, required: Iterable[str], have: Iterable[str]) -> Optional[float]:
+        """Share of the required skills the candidate has (0-100); None when nothing is required."""
+        matched, missing = self.overlap(required, have)
+        total = len(matched) + len(missing)
+        return round(100.0 * len(matched) / total, 2) if total else None
+
+
+def load_vocabulary() -> Dict[str, List[str]]:
+    """Bundled taxonomy (SKILL_TAXONOMY_PATH) plus the skills HR has added per department."""
+    vocabulary: Dict[str, List[str]] = {}
+    try:
+        with open(settings.SKILL_TAXONOMY_PATH, encoding="utf-8") as f:
+            vocabulary.update(json.load(f))
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load skill taxonomy from {settings.SKILL_TAXONOMY_PATH}: {e}")
+
+    known = {_normalize(alias).strip() for name, aliases in vocabulary.items() for alias in (name, *aliases)}
+    try:
+        from infrastructure.database.connection import SessionLocal
+        from infrastructure.database.models import DepartmentSkill
+
+        db = SessionLocal()
+        try:
+            names = [row[0] for row in db.query(DepartmentSkill.skill_name).distinct()]
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"Could not load department skills, using the bundled taxonomy only: {e}")
+        names = []
+
+    for name in names:
+        key = _normalize(name or "").strip()
+        if key and key not in known:
+            known.add(key)
+            vocabulary[name.strip()] = []
+    return vocabulary
+
+
+_matcher: Optional[SkillMatcher] = None
+_matcher_built_at = 0.0
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """
+    Process-wide matcher, rebuilt when older than SKILL_VOCABULARY_TTL_SECONDS
+    so department skills added in another process are picked up.
+    """
+    global _matcher, _matcher_built_at
+    with _matcher_lock:
+        if _matcher is None or time.monotonic() - _matcher_built_at >= settings.SKILL_VOCABULARY_TTL_SECONDS:
+            _matcher = SkillMatcher(load_vocabulary())
+            _matcher_built_at = time.monotonic()
+            logger.info(f"Skill matcher built with {len(_matcher)} aliases")
+        return _matcher
+
+
+def invalidate_skill_matcher() -> None:
+    """Forces a rebuild on next use, e.g. after a department skill was added."""
+    global _matcher
+    with _matcher_lock:
+        _matcher = None
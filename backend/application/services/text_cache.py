@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import os
+import threading
+from typing import Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResumeTextCache:
+    """
+    Content-addressed on-disk cache of extracted resume text.
+    Entries are keyed by the SHA-256 of the source file, so re-uploads of the same
+    CV under any name or candidate share one entry. Total size is bounded by
+    RESUME_TEXT_CACHE_MAX_BYTES; the least recently used entries are evicted first.
+    The size is tracked incrementally per process; the directory is only scanned
+    on first write and when the running total goes over budget, and eviction then
+    frees down to EVICT_TO_RATIO of the budget so scans stay rare.
+    Blocking file I/O: call from a worker thread when on an event loop.
+    """
+
+    EVICT_TO_RATIO = 0.9
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or settings.RESUME_TEXT_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.RESUME_TEXT_CACHE_MAX_BYTES
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None  # Running total, rescanned only when over budget
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # Fan out by hash prefix to keep directory listings small
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            # Touch so eviction treats this entry as recently used
+            os.utime(path, None)
+            return text
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read resume text cache entry {key}: {e}")
+            return None
+
+    def set(self, key: str, text: str) -> None:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                replaced_bytes = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced_bytes = 0
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            self._evict(added_bytes=os.path.getsize(path) - replaced_bytes)
+        except OSError as e:
+            logger.warning(f"Failed to write resume text cache entry {key}: {e}")
+
+    def _evict(self, added_bytes: int) -> None:
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += added_bytes
+                if self._approx_bytes <= self.max_bytes:
+                    return
+
+            entries = []
+            total = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".txt"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            if total > self.max_bytes:
+                target = int(self.max_bytes * self.EVICT_TO_RATIO)
+                for _, size, path in sorted(entries):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    if total <= target:
+                        break
+            self._approx_bytes = total
@@ -0,0 +1,225 @@
+import fcntl
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Keeps "IN (...)" lists under SQLite's bound-parameter limit
+_SQL_CHUNK = 900
+
+
+def _chunks(values: List, size: int = _SQL_CHUNK) -> Iterator[List]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class VectorIndex:
+    """
+    Persistent, incrementally updated store of L2-normalised embeddings.
+
+    Vectors live in a memory-mapped float32 .npy matrix with one row per slot, and a
+    memory-mapped bool array marks which slots are in use. Slot ownership and content
+    fingerprints live in a small SQLite table, so adding, replacing or removing one
+    entry touches a few rows and bytes instead of rewriting any per-index file.
+    Removed slots are reused, and the matrix doubles in size when full. Writes take
+    an exclusive file lock and readers remap the arrays if another process (e.g. a
+    Celery worker) grew them, so API and workers can share one index.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, name: str, directory: Optional[str] = None):
+        self.directory = directory or settings.VECTOR_INDEX_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, f"{name}.npy")
+        self.live_path = os.path.join(self.directory, f"{name}.live.npy")
+        self.db_path = os.path.join(self.directory, f"{name}.sqlite")
+        self.lock_path = os.path.join(self.directory, f"{name}.lock")
+        self._thread_lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._live: Optional[np.ndarray] = None
+        self._mapped_inode: Optional[int] = None
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS slots ("
+            " position INTEGER PRIMARY KEY,"
+            " key TEXT UNIQUE,"
+            " fingerprint TEXT)"
+        )
+        self._conn.commit()
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._thread_lock:
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    self._remap_if_replaced()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _remap_if_replaced(self) -> None:
+        """Maps the arrays again if they were grown (i.e. replaced) since they were mapped."""
+        try:
+            inode = os.stat(self.vectors_path).st_ino
+        except FileNotFoundError:
+            self._vectors, self._live, self._mapped_inode = None, None, None
+            return
+        if inode == self._mapped_inode:
+            return
+        self._vectors = np.load(self.vectors_path, mmap_mode="r+")
+        self._live = np.load(self.live_path, mmap_mode="r+")
+        self._mapped_inode = inode
+
+    def _grow_file(self, path: str, shape: Tuple[int, ...], dtype, current: Optional[np.ndarray]) -> None:
+        tmp_path = f"{path}.tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+        if current is not None:
+            grown[:current.shape[0]] = current
+        grown.flush()
+        del grown
+        os.replace(tmp_path, path)
+
+    def _ensure_capacity(self, needed: int, dim: int) -> None:
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            # Embedding model changed; old vectors are meaningless
+            logger.warning(f"Embedding dimension changed for {self.vectors_path}, rebuilding index")
+            self._conn.execute("DELETE FROM slots")
+            self._vectors, self._live = None, None
+
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= capacity:
+            return
+
+        new_capacity = max(self.INITIAL_CAPACITY, capacity)
+        while new_capacity < needed:
+            new_capacity *= 2
+        # Live flags first: a reader that maps the new matrix must find matching flags
+        self._grow_file(self.live_path, (new_capacity,), bool, self._live)
+        self._grow_file(self.vectors_path, (new_capacity, dim), np.float32, self._vectors)
+        self._mapped_inode = None
+        self._remap_if_replaced()
+
+    def _positions(self, keys: List[str]) -> Dict[str, int]:
+        positions: Dict[str, int] = {}
+        for chunk in _chunks(keys):
+            positions.update(self._conn.execute(
+                f"SELECT key, position FROM slots WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return positions
+
+    def __len__(self) -> int:
+        with self._locked(exclusive=False):
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM slots WHERE key IS NOT NULL").fetchone()
+            return count
+
+    def keys(self) -> List[str]:
+        with self._locked(exclusive=False):
+            return [key for (key,) in self._conn.execute("SELECT key FROM slots WHERE key IS NOT NULL")]
+
+    def fingerprints(self, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Returns the stored content fingerprint for each key (None if not indexed)."""
+        keys = list(keys)
+        found: Dict[str, str] = {}
+        with self._locked(exclusive=False):
+            for chunk in _chunks(keys):
+                found.update(self._conn.execute(
+                    f"SELECT key, fingerprint FROM slots WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        return {key: found.get(key) for key in keys}
+
+    def upsert(self, items: List[Tuple[str, str, np.ndarray]]) -> None:
+        """Adds or replaces (key, fingerprint, vector) entries in one write."""
+        if not items:
+            return
+        with self._locked(exclusive=True):
+            dim = len(items[0][2])
+            if self._vectors is not None and self._vectors.shape[1] != dim:
+                self._ensure_capacity(0, dim)
+            positions = self._positions(list(dict.fromkeys(key for key, _, _ in items)))
+            new_keys = list(dict.fromkeys(key for key, _, _ in items if key not in positions))
+            if new_keys:
+                free = [position for (position,) in self._conn.execute(
+                    "SELECT position FROM slots WHERE key IS NULL ORDER BY position LIMIT ?", (len(new_keys),)
+                )]
+                (next_position,) = self._conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM slots").fetchone()
+                for key in new_keys:
+                    if free:
+                        positions[key] = free.pop(0)
+                    else:
+                        positions[key] = next_position
+                        next_position += 1
+            self._ensure_capacity(max(positions.values()) + 1, dim)
+
+            for key, _, vector in items:
+                self._vectors[positions[key]] = vector
+                self._live[positions[key]] = True
+            self._vectors.flush()
+            self._live.flush()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO slots (position, key, fingerprint) VALUES (?, ?, ?)",
+                [(positions[key], key, fingerprint) for key, fingerprint, _ in items]
+            )
+            self._conn.commit()
+
+    def remove(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        with self._locked(exclusive=True):
+            positions = self._positions(keys)
+            if not positions:
+                return
+            if self._live is not None:
+                self._live[list(positions.values())] = False
+                self._live.flush()
+            self._conn.executemany(
+                "UPDATE slots SET key = NULL, fingerprint = NULL WHERE position = ?",
+                [(position,) for position in positions.values()]
+            )
+            self._conn.commit()
+
+    def get_vectors(self, keys: List[str]) -> Tuple[List[str], Optional[np.ndarray]]:
+        """Returns the subset of keys that are indexed and their vectors, in that order."""
+        with self._locked(exclusive=False):
+            positions = self._positions(keys)
+            found = [key for key in keys if key in positions]
+            if not found or self._vectors is None:
+                return [], None
+            return found, np.array(self._vectors[[positions[key] for key in found]])
+
+    def search(self, query: np.ndarray, k: int, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """
+        Exact k-nearest-neighbour search: the k keys whose vectors have the highest
+        cosine similarity to query (itself L2-normalised), best first. One
+        matrix-vector product over the memory-mapped matrix plus a partial sort,
+        so it stays in the tens of milliseconds at 100k vectors.
+        """
+        exclude = list(exclude)
+        with self._locked(exclusive=False):
+            if self._vectors is None or k <= 0:
+                return []
+            scores = self._vectors @ np.asarray(query, dtype=np.float32)
+            scores[~self._live] = -np.inf
+            scores[list(self._positions(exclude).values())] = -np.inf
+
+            k = min(k, int(np.isfinite(scores).sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            keys = dict(self._conn.execute(
+                f"SELECT position, key FROM slots WHERE position IN ({','.join('?' * len(top))})",
+                [int(position) for position in top]
+            ).fetchall())
+            return [(keys[int(i)], float(scores[i])) for i in top if int(i) in keys]
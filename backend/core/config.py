@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Any, Dict, List
 
 
 class Settings(BaseSettings):
@@ -72,10 +72,52 @@ class Settings(BaseSettings):
     AI_ENABLED: bool = True
     RESUME_PARSING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     JD_GENERATION_MODEL: str = "gpt2"
+    OLLAMA_BASE_URL: str = "http://localhost:11434"
+    OLLAMA_MODEL: str = "llama3"
+    AI_TASK_MODELS: str = ""  # "task=model" pairs, comma separated; unlisted tasks use OLLAMA_MODEL
+    AI_MODEL_ESCALATION: bool = True  # Retry on OLLAMA_MODEL when a task model's JSON fails validation
+    AI_MAX_CONCURRENT_REQUESTS: int = 2
+    AI_BULK_MAX_CONCURRENT_REQUESTS: int = 0  # 0 = one slot fewer than AI_MAX_CONCURRENT_REQUESTS (min 1)
+    AI_BULK_MAX_REQUESTS_PER_MINUTE: int = 60  # 0 = unlimited
+    AI_REQUEST_TIMEOUT_SECONDS: float = 120.0
+    AI_HTTP_MAX_CONNECTIONS: int = 20
+    AI_HEALTH_CHECK_TTL_SECONDS: float = 30.0
+    AI_HEALTH_PROBE_TIMEOUT_SECONDS: float = 1.0
+    AI_CIRCUIT_FAILURE_THRESHOLD: int = 3  # Consecutive failed calls before failing fast
+    AI_CIRCUIT_RESET_SECONDS: float = 30.0
+    AI_CONTEXT_BUCKETS: str = "2048,4096,8192"  # Allowed num_ctx sizes, smallest fitting one is used
+    OLLAMA_HOSTS: str = ""  # "url[;weight=N][;max_concurrency=N]", comma separated; defaults to OLLAMA_BASE_URL
+    AI_RANKING_CONCURRENCY: int = 0  # 0 = bulk slots (AI_BULK_MAX_CONCURRENT_REQUESTS) per host
+    AI_RANKING_COMMIT_BATCH_SIZE: int = 25
+    AI_RANKING_PROMPT_BATCH_SIZE: int = 8  # Candidates scored per LLM call; 1 disables batching
+    AI_RANKING_KEEP_ALIVE: str = "30m"  # Keeps the model (and cached JD prefix) loaded during a ranking run
+    AI_DEFAULT_KEEP_ALIVE: str = "5m"  # Restored once the run is over (Ollama's default)
+    AI_PREFILTER_TOP_K: int = 50  # 0 disables the embedding pre-filter
+    VECTOR_INDEX_DIR: str = "./data/vector_index"
+    RESUME_TEXT_CACHE_DIR: str = "./data/resume_text"
+    RESUME_TEXT_CACHE_MAX_BYTES: int = 200 * 1024 * 1024
+    PDF_EXTRACT_WORKERS: int = 2
+    PDF_MAX_PAGES: int = 10
+    PDF_EXTRACT_TIMEOUT_SECONDS: float = 15.0
+    RESUME_TEXT_MAX_CHARS: int = 20000  # Raw text kept per resume, before section packing
+    RESUME_PROMPT_TOKEN_BUDGET: int = 1500  # Resume text sent to the LLM for parsing
+    AI_RESULT_CACHE_PATH: str = "./data/ai_result_cache.sqlite3"
+    AI_RESULT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    AI_RESULT_CACHE_MAX_ENTRIES: int = 50000
+    SKILL_TAXONOMY_PATH: str = "resources/skill_taxonomy.json"
+    SKILL_VOCABULARY_TTL_SECONDS: float = 300.0  # Department skills added elsewhere are picked up after this
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Background Tasks
+    CELERY_ENABLED: bool = True  # Falls back to in-process parsing if the broker is unreachable
+    RESUME_PARSE_MAX_RETRIES: int = 3
+    MATCH_MATRIX_HOUR: int = 2  # Nightly rebuild of the candidate x job match matrix (UTC hour)
+    MATCH_MATRIX_CANDIDATES_PER_POSTING: int = 200
+    MATCH_MATRIX_POSTINGS_PER_CANDIDATE: int = 10
+    MATCH_MATRIX_MIN_SCORE: float = 20.0  # Fast-scorer matches below this are not stored
+    
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:8080"
     
@@ -90,6 +132,38 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
+    @property
+    def ai_context_buckets(self) -> List[int]:
+        return sorted(int(size) for size in self.AI_CONTEXT_BUCKETS.split(",") if size.strip())
+    
+    @property
+    def ai_task_models(self) -> Dict[str, str]:
+        pairs = [pair.split("=", 1) for pair in self.AI_TASK_MODELS.split(",") if "=" in pair]
+        return {task.strip(): model.strip() for task, model in pairs if model.strip()}
+    
+    @property
+    def ollama_backends(self) -> List[Dict[str, Any]]:
+        """
+        Parses OLLAMA_HOSTS entries of the form "url[;weight=N][;max_concurrency=N]".
+        Falls back to OLLAMA_BASE_URL with default weight and concurrency.
+        """
+        backends = []
+        for entry in self.OLLAMA_HOSTS.split(","):
+            parts = [part.strip() for part in entry.split(";") if part.strip()]
+            if not parts:
+                continue
+            params = dict(part.split("=", 1) for part in parts[1:] if "=" in part)
+            backends.append({
+                "url": parts[0],
+                "weight": float(params.get("weight", 1)),
+                "max_concurrency": int(params.get("max_concurrency", self.AI_MAX_CONCURRENT_REQUESTS))
+            })
+        return backends or [{
+            "url": self.OLLAMA_BASE_URL,
+            "weight": 1.0,
+            "max_concurrency": self.AI_MAX_CONCURRENT_REQUESTS
+        }]
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, String, Boolean, Integer, DECIMAL, TIMESTAMP, Text, 
-    Date, ForeignKey, ARRAY, JSON, CheckConstraint, UniqueConstraint
+    Date, ForeignKey, ARRAY, JSON, CheckConstraint, UniqueConstraint, Index, SmallInteger, REAL
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
@@ -126,6 +126,18 @@ class JobRequisitionApproval(Base):
     approver = relationship("User")
 
 
+class DepartmentSkill(Base):
+    __tablename__ = "department_skills"
+    __table_args__ = (
+        UniqueConstraint("department", "skill_name", name="uq_department_skill"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    department = Column(String(100), nullable=False, index=True)
+    skill_name = Column(String(100), nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
 class JobPosting(Base):
     __tablename__ = "job_postings"
     
@@ -233,11 +245,28 @@ class CandidateDocument(Base):
     document_type = Column(String(50), nullable=False)  # resume, cover_letter, certification, other
     file_name = Column(String(255), nullable=False)
     file_url = Column(String(500), nullable=False)
+    mime_type = Column(String(100))
     uploaded_at = Column(TIMESTAMP, server_default=func.now())
     
     candidate = relationship("Candidate", back_populates="documents")
 
 
+class ResumeParseJob(Base):
+    __tablename__ = "resume_parse_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    candidate_id = Column(UUID(as_uuid=True), ForeignKey("candidates.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String(50), default="queued", index=True)  # queued, running, succeeded, failed
+    progress = Column(Integer, default=0)  # 0-100
+    attempts = Column(Integer, default=0)
+    error = Column(Text)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    started_at = Column(TIMESTAMP)
+    finished_at = Column(TIMESTAMP)
+    
+    candidate = relationship("Candidate")
+
+
 class Application(Base):
     __tablename__ = "applications"
     
@@ -250,6 +279,11 @@ class Application(Base):
     cover_letter = Column(Text)
     ai_match_score = Column(DECIMAL(5, 2))
     ai_match_reasoning = Column(Text)
+    # Inputs the stored score was computed from; ranking runs skip applications whose inputs are unchanged
+    ai_jd_fingerprint = Column(String(64))
+    ai_profile_fingerprint = Column(String(64))
+    ai_model_version = Column(String(200))
+    ai_ranked_at = Column(TIMESTAMP)
     applied_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
@@ -260,6 +294,29 @@ class Application(Base):
     offers = relationship("Offer", back_populates="application")
 
 
+class CandidateJobMatch(Base):
+    """
+    Precomputed sparse top-K match matrix between active candidates and active job
+    postings (fast scorer), rebuilt nightly. Each row is in the top matches of its
+    posting, of its candidate, or both.
+    """
+    __tablename__ = "candidate_job_matches"
+    __table_args__ = (
+        Index("ix_candidate_job_matches_posting_score", "job_posting_id", "score"),
+        Index("ix_candidate_job_matches_candidate_score", "candidate_id", "score"),
+    )
+    
+    job_posting_id = Column(UUID(as_uuid=True), ForeignKey("job_postings.id", ondelete="CASCADE"), primary_key=True)
+    candidate_id = Column(UUID(as_uuid=True), ForeignKey("candidates.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(REAL, nullable=False)  # 0-100
+    posting_rank = Column(SmallInteger)  # 1 = best candidate for the posting; NULL if outside its top K
+    candidate_rank = Column(SmallInteger)  # 1 = best posting for the candidate; NULL if outside its top K
+    computed_at = Column(TIMESTAMP, server_default=func.now())
+    
+    job_posting = relationship("JobPosting")
+    candidate = relationship("Candidate")
+
+
 class Interview(Base):
     __tablename__ = "interviews"
     
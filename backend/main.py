@@ -9,6 +9,7 @@ from fastapi.staticfiles import StaticFiles
 
 from core.config import settings
 from infrastructure.database.connection import init_db
+from application.services.ai_service import shutdown_ai_resources
 from api.routers import auth, job_requisitions, job_postings, candidates, applications, interviews, offers, dashboard, ai, onboarding, shortlisted_candidates
 
 # Configure logging
@@ -37,6 +38,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down AgenticHR application...")
+    await shutdown_ai_resources()
 
 
 # Create FastAPI application
@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine, text
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+db_url = os.getenv("DATABASE_URL")
+
+engine = create_engine(db_url)
+
+with engine.connect() as conn:
+    print("Adding ranking fingerprint columns to applications table...")
+    try:
+        conn.execute(text("ALTER TABLE applications ADD COLUMN IF NOT EXISTS ai_jd_fingerprint VARCHAR(64);"))
+        conn.execute(text("ALTER TABLE applications ADD COLUMN IF NOT EXISTS ai_profile_fingerprint VARCHAR(64);"))
+        conn.execute(text("ALTER TABLE applications ADD COLUMN IF NOT EXISTS ai_model_version VARCHAR(200);"))
+        conn.execute(text("ALTER TABLE applications ADD COLUMN IF NOT EXISTS ai_ranked_at TIMESTAMP;"))
+        conn.commit()
+        print("Columns added successfully!")
+    except Exception as e:
+        print(f"Error: {e}")
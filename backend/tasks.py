@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from celery import Celery
+from celery.schedules import crontab
+
+from core.config import settings
+from application.services.resume_parsing_service import run_parse_job, RetryableParseError
+from application.services.match_matrix_service import run_match_matrix_job
+
+logger = logging.getLogger(__name__)
+
+app = Celery("tasks", broker=settings.REDIS_URL, backend=settings.REDIS_URL)
+app.conf.update(
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    # Fail fast when publishing so the API can fall back to in-process parsing
+    broker_connection_timeout=2,
+    task_publish_retry=False
+)
+# Run by the worker's embedded beat scheduler (celery -A tasks worker -B)
+app.conf.beat_schedule = {
+    "rebuild-match-matrix": {
+        "task": "tasks.compute_match_matrix",
+        "schedule": crontab(hour=settings.MATCH_MATRIX_HOUR, minute=0),
+    },
+}
+app.conf.timezone = "UTC"
+
+# One event loop per worker process, reused across tasks so process-wide
+# asyncio primitives in AIService stay bound to a single loop.
+_loop = None
+
+
+def _run(coro):
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+@app.task(bind=True, name="tasks.parse_resume", max_retries=settings.RESUME_PARSE_MAX_RETRIES)
+def parse_resume_task(self, job_id: str):
+    """Parses a candidate resume in the background and records progress on its ResumeParseJob."""
+    try:
+        _run(run_parse_job(job_id, final_attempt=self.request.retries >= self.max_retries))
+    except RetryableParseError as e:
+        logger.warning(f"Resume parse job {job_id} will be retried: {e}")
+        raise self.retry(exc=e, countdown=min(60, 2 ** self.request.retries * 5))
+
+
+@app.task(name="tasks.compute_match_matrix")
+def compute_match_matrix_task():
+    """Rebuilds the candidate x job posting match matrix; scheduled nightly."""
+    return _run(run_match_matrix_job())
@@ -179,6 +179,10 @@ CREATE TABLE applications (
     status VARCHAR(50) DEFAULT 'applied', -- applied, screening, shortlisted, interview, selected, offered, rejected, withdrawn
     ai_match_score DECIMAL(5, 2), -- 0-100
     ai_match_reasoning TEXT,
+    ai_jd_fingerprint VARCHAR(64), -- Inputs the score was computed from (incremental re-ranking)
+    ai_profile_fingerprint VARCHAR(64),
+    ai_model_version VARCHAR(200),
+    ai_ranked_at TIMESTAMP,
     cover_letter TEXT,
     applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP